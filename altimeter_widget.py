@@ -1,176 +1,170 @@
-from PyQt5 import QtWidgets, QtGui, QtCore
-import math
-
-class AltimeterWidget(QtWidgets.QWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.altitude = 0
-        self.target_altitude = 0
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.update_altitude)
-        self.timer.start(30)  # Update every 30 milliseconds
-        self.setFixedSize(360, 360)
-        self.setContentsMargins(0, 0, 0, 0)  # Set margins to zero
-
-    def paintEvent(self, event):
-        painter = QtGui.QPainter(self)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
-
-        # Create a clipping path with rounded corners
-        path = QtGui.QPainterPath()
-        path.addRoundedRect(QtCore.QRectF(self.rect()), 30, 30)
-        painter.setClipPath(path)
-
-        # Fill the background
-        painter.fillRect(self.rect(), QtGui.QColor("#171717"))
-
-        # Draw the altimeter circle
-        painter.setBrush(QtCore.Qt.NoBrush)
-        painter.setPen(QtGui.QPen(QtGui.QColor("#454545"), 5))
-        painter.drawEllipse(26, 26, 308, 308)  # Adjusted to 308x308
-
-        # Draw altitude markings and numbers
-        for i in range(0, 360, 36):  # 10 major tick marks
-            angle = math.radians(i - 90)  # Adjust angle to start from 12 o'clock
-            x1 = int(180 + 135 * math.cos(angle))
-            y1 = int(180 + 135 * math.sin(angle))
-            x2 = int(180 + 150 * math.cos(angle))
-            y2 = int(180 + 150 * math.sin(angle))
-            painter.setPen(QtGui.QPen(QtGui.QColor("#FFFFFF"), 5))
-            painter.drawLine(x1, y1, x2, y2)
-
-            # Draw the numbers
-            number = (i // 36) % 10
-            num_x = int(180 + 120 * math.cos(angle))
-            num_y = int(180 + 120 * math.sin(angle))
-            font = painter.font()
-            font.setFamily("Courier")  # Set font to Courier
-            font.setPointSize(22)
-            font.setBold(True)  # Make numbers bold
-            painter.setFont(font)
-            painter.drawText(num_x - 20, num_y - 20, 40, 40, QtCore.Qt.AlignCenter, str(number))  # Adjusted position and size
-
-            # Draw the smaller tick marks
-            for j in range(1, 5):  # 4 tick marks
-                small_angle = angle + math.radians(j * 7.2)
-                x1 = int(180 + 140 * math.cos(small_angle))
-                y1 = int(180 + 140 * math.sin(small_angle))
-                x2 = int(180 + 150 * math.cos(small_angle))
-                y2 = int(180 + 150 * math.sin(small_angle))
-                painter.setPen(QtGui.QPen(QtGui.QColor("#FFFFFF"), 2))
-                painter.drawLine(x1, y1, x2, y2)
-
-        # Draw the "ALT" label
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 1))
-        painter.setBrush(QtGui.QColor("#444"))
-        painter.drawRect(120, 120, 60, 30)  # Move ALT label slightly lower and closer to center
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 2))
-        painter.drawText(120, 120, 60, 30, QtCore.Qt.AlignCenter, "ALT")
-
-        # Draw the labels "100" and "Feet" following the circular arc
-        font.setPointSize(8)  # Set smaller font size
-        painter.setFont(font)
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 2))
-
-        # Draw "100" label on the left half between 9 and 0
-        angle = math.radians(-110)  # Adjust angle to position the text
-        painter.save()
-        painter.translate(180 + 140 * math.cos(angle), 180 + 140 * math.sin(angle))
-        painter.rotate(math.degrees(angle) + 90)
-        painter.drawText(-10, 16, "100")  # Adjust text position
-        painter.restore()
-
-        # Draw "FEET" label on the right half between 0 and 1
-        angle = math.radians(-76)  # Adjust angle to position the text
-        painter.save()
-        painter.translate(180 + 140 * math.cos(angle), 180 + 140 * math.sin(angle))
-        painter.rotate(math.degrees(angle) + 90)
-        painter.drawText(-11, 16, "F")  # Adjust text position for each letter
-        painter.drawText(0, 16, "E")
-        painter.drawText(10, 17, "E")
-        painter.drawText(20, 18, "T")
-        painter.restore()
-
-        # Draw the second hand (hundreds of feet)
-        angle = math.radians((self.altitude % 1000) * 360 / 1000 - 90)
-        x = int(180 + 114 * math.cos(angle))
-        y = int(180 + 114 * math.sin(angle))
-
-        # Draw the thicker line for the second hand
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 9))  # Increase thickness
-        painter.drawLine(180, 180, x, y)
-
-        # Draw the pointy triangle at the end of the line
-        mid_x = int(180 + 118 * math.cos(angle))
-        mid_y = int(180 + 118 * math.sin(angle))
-        triangle_path = QtGui.QPainterPath()
-        triangle_path.moveTo(mid_x + 10 * math.cos(angle), mid_y + 10 * math.sin(angle))  # Adjust triangle position
-        triangle_path.lineTo(mid_x + 4 * math.cos(angle - math.radians(90)), mid_y + 4 * math.sin(angle - math.radians(90)))
-        triangle_path.lineTo(mid_x + 4 * math.cos(angle + math.radians(90)), mid_y + 4 * math.sin(angle + math.radians(90)))
-        triangle_path.closeSubpath()
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 1))
-        painter.setBrush(QtGui.QColor("white"))
-        painter.drawPath(triangle_path)
-
-        # Draw the hour hand (thousands of feet) with varying thickness
-        angle = math.radians((self.altitude // 1000) * 360 / 10 - 90)
-
-        # Define the lengths for each segment
-        length1 = 20  # First 1/3 (thin)
-        length2 = 60  # Remaining 2/3 (thick)
-
-        # Calculate the points for each segment
-        x1 = int(180 + length1 * math.cos(angle))
-        y1 = int(180 + length1 * math.sin(angle))
-        x2 = int(x1 + length2 * math.cos(angle))
-        y2 = int(y1 + length2 * math.sin(angle))
-
-        # Draw the first thin segment
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 3))
-        painter.drawLine(180, 180, x1, y1)
-
-        # Draw the remaining thick segment
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 9))
-        painter.drawLine(x1, y1, x2, y2)
-
-        # Draw the shortest needle (tens of thousands of feet) with an upside-down triangle
-        angle = math.radians((self.altitude // 10000) * 360 / 10 - 90)
-        x = int(180 + 150 * math.cos(angle))  # Extends the line length to reach the ellipse
-        y = int(180 + 150 * math.sin(angle))
-
-        # Draw the thicker bottom half of the hand with a border
-        painter.setPen(QtGui.QPen(QtGui.QColor("black"), 15))  # Border
-        painter.drawLine(180, 180, int(180 + 75 * math.cos(angle)), int(180 + 75 * math.sin(angle)))
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 6))  # Fill
-        painter.drawLine(180, 180, int(180 + 75 * math.cos(angle)), int(180 + 75 * math.sin(angle)))
-
-        # Draw the thinner top half of the hand with a border
-        painter.setPen(QtGui.QPen(QtGui.QColor("black"), 5))  # Border
-        painter.drawLine(int(180 + 75 * math.cos(angle)), int(180 + 75 * math.sin(angle)), x, y)
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 3))  # Fill
-        painter.drawLine(int(180 + 75 * math.cos(angle)), int(180 + 75 * math.sin(angle)), x, y)
-
-        # Draw the smaller white triangle higher on the line with a black border
-        triangle_x = int(180 + 146 * math.cos(angle))  # Move the triangle higher by increasing the distance from the center
-        triangle_y = int(180 + 146 * math.sin(angle))
-        triangle_path = QtGui.QPainterPath()
-        triangle_path.moveTo(triangle_x - 30 * math.cos(angle), triangle_y - 30 * math.sin(angle))  # Adjust triangle position
-        triangle_path.lineTo(triangle_x + 15 * math.cos(angle - math.radians(90)), triangle_y + 15 * math.sin(angle - math.radians(90)))  # Adjust triangle size
-        triangle_path.lineTo(triangle_x + 15 * math.cos(angle + math.radians(90)), triangle_y + 15 * math.sin(angle + math.radians(90)))  # Adjust triangle size
-        triangle_path.closeSubpath()
-        painter.setPen(QtGui.QPen(QtGui.QColor("black"), 1))  # Border
-        painter.setBrush(QtGui.QColor("white"))  # Fill
-        painter.drawPath(triangle_path)
-        
-    def update_altitude(self):
-        self.altitude += 2  # Simulate slower altitude change (For demo)
-        if self.altitude > 100000:
-            self.altitude = 0
-        self.update()
-
-if __name__ == "__main__":
-    import sys
-    app = QtWidgets.QApplication(sys.argv)
-    window = AltimeterWidget()
-    window.show()
-    sys.exit(app.exec_())
+from PyQt5 import QtWidgets, QtCore
+import math
+from dial_geometry import needle_shape, ring_points, tick_lines
+from dirty_region import DirtyRegions, needle_bounds
+from frame_clock import shared_clock
+from instrument_models import AltimeterModel
+from layer_cache import DESIGN_SIZE, LayerCache, paint_instrument, painter_scale, render_layer
+from paint_resources import brush, color, font, pen, rounded_rect_path
+
+class AltimeterWidget(QtWidgets.QWidget):
+    PROFILED_METHODS = ("paintEvent", "draw_needles")  # Timed by the diagnostics overlay when enabled
+
+    def __init__(self, parent=None, clock=None):
+        super().__init__(parent)
+        self.model = AltimeterModel()
+        self.clock = clock or shared_clock()
+        self.clock.subscribe(self, self.update_altitude, 30)  # Update every 30 milliseconds
+        self.setMinimumSize(150, 150)
+        self.setContentsMargins(0, 0, 0, 0)  # Set margins to zero
+
+        # Static dial faces, rendered once per size and device pixel ratio
+        self.layers = LayerCache()
+        self.dirty = DirtyRegions(self)
+        self.frame = None  # Finished image from a render thread, blitted instead of painting (threaded_render)
+
+    def sizeHint(self):
+        return QtCore.QSize(DESIGN_SIZE, DESIGN_SIZE)
+
+    def paintEvent(self, event):
+        paint_instrument(self)
+
+    def paint(self, painter):
+        # Draws in design units; also used to paint fleet view tiles
+
+        # Blit the cached dial face, then draw only the moving needles on top
+        self.get_dial_layer(painter_scale(painter)).draw(painter)
+        self.draw_needles(painter)
+
+    def get_dial_layer(self, scale):
+        return self.layers.get(scale, lambda: render_layer(scale, self.draw_dial))
+
+    def draw_dial(self, painter):
+        # Create a clipping path with rounded corners
+        painter.setClipPath(rounded_rect_path(0, 0, DESIGN_SIZE, DESIGN_SIZE, 30))
+
+        # Fill the background
+        painter.fillRect(QtCore.QRectF(0, 0, DESIGN_SIZE, DESIGN_SIZE), color("#171717"))
+
+        # Draw the altimeter circle
+        painter.setBrush(QtCore.Qt.NoBrush)
+        painter.setPen(pen("#454545", 5))
+        painter.drawEllipse(26, 26, 308, 308)  # Adjusted to 308x308
+
+        # Draw altitude markings: 10 major tick marks with 4 smaller ones after each
+        major_angles = tuple(range(0, 360, 36))
+        minor_angles = tuple(angle + j * 7.2 for angle in major_angles for j in range(1, 5))
+        painter.setPen(pen("#FFFFFF", 2))
+        painter.drawLines(tick_lines(minor_angles, 140, 150))
+        painter.setPen(pen("#FFFFFF", 5))
+        painter.drawLines(tick_lines(major_angles, 135, 150))
+
+        # Draw the numbers
+        painter.setFont(font("Courier", 22, True))  # Bold Courier
+        for number, anchor in enumerate(ring_points(major_angles, 120)):
+            painter.drawText(QtCore.QRectF(anchor.x() - 20, anchor.y() - 20, 40, 40), QtCore.Qt.AlignCenter, str(number))  # Adjusted position and size
+
+        # Draw the "ALT" label
+        painter.setPen(pen("white", 1))
+        painter.setBrush(brush("#444"))
+        painter.drawRect(120, 120, 60, 30)  # Move ALT label slightly lower and closer to center
+        painter.setPen(pen("white", 2))
+        painter.drawText(120, 120, 60, 30, QtCore.Qt.AlignCenter, "ALT")
+
+        # Draw the labels "100" and "Feet" following the circular arc
+        painter.setFont(font("Courier", 8, True))  # Set smaller font size
+        painter.setPen(pen("white", 2))
+
+        # Draw "100" label on the left half between 9 and 0
+        angle = math.radians(-110)  # Adjust angle to position the text
+        painter.save()
+        painter.translate(180 + 140 * math.cos(angle), 180 + 140 * math.sin(angle))
+        painter.rotate(math.degrees(angle) + 90)
+        painter.drawText(-10, 16, "100")  # Adjust text position
+        painter.restore()
+
+        # Draw "FEET" label on the right half between 0 and 1
+        angle = math.radians(-76)  # Adjust angle to position the text
+        painter.save()
+        painter.translate(180 + 140 * math.cos(angle), 180 + 140 * math.sin(angle))
+        painter.rotate(math.degrees(angle) + 90)
+        painter.drawText(-11, 16, "F")  # Adjust text position for each letter
+        painter.drawText(0, 16, "E")
+        painter.drawText(10, 17, "E")
+        painter.drawText(20, 18, "T")
+        painter.restore()
+
+    def needle_angles(self):
+        # Hundreds, thousands and tens of thousands of feet, in degrees clockwise from 12 o'clock
+        altitude = self.model.altitude
+        return (
+            (altitude % 1000) * 360 / 1000,
+            (altitude // 1000) * 360 / 10,
+            (altitude // 10000) * 360 / 10,
+        )
+
+    def draw_needles(self, painter):
+        # Each needle is drawn pointing at 12 o'clock in a frame rotated to its angle
+        hundreds_angle, thousands_angle, ten_thousands_angle = self.needle_angles()
+
+        # Draw the second hand (hundreds of feet) with a pointy triangle at the end of the line
+        painter.save()
+        painter.translate(180, 180)
+        painter.rotate(hundreds_angle)
+        painter.setPen(pen("white", 9))  # Increase thickness
+        painter.drawLine(QtCore.QLineF(0, 0, 0, -114))
+        painter.setPen(pen("white", 1))
+        painter.setBrush(brush("white"))
+        painter.drawPolygon(needle_shape(((0, -128), (-4, -118), (4, -118))))
+        painter.restore()
+
+        # Draw the hour hand (thousands of feet) with varying thickness: a thin first 1/3 and a thick remaining 2/3
+        painter.save()
+        painter.translate(180, 180)
+        painter.rotate(thousands_angle)
+        painter.setPen(pen("white", 3))
+        painter.drawLine(QtCore.QLineF(0, 0, 0, -20))
+        painter.setPen(pen("white", 9))
+        painter.drawLine(QtCore.QLineF(0, -20, 0, -80))
+        painter.restore()
+
+        # Draw the shortest needle (tens of thousands of feet), extended to reach the ellipse, with an upside-down triangle
+        painter.save()
+        painter.translate(180, 180)
+        painter.rotate(ten_thousands_angle)
+
+        # Draw the thicker bottom half of the hand with a border
+        painter.setPen(pen("black", 15))  # Border
+        painter.drawLine(QtCore.QLineF(0, 0, 0, -75))
+        painter.setPen(pen("white", 6))  # Fill
+        painter.drawLine(QtCore.QLineF(0, 0, 0, -75))
+
+        # Draw the thinner top half of the hand with a border
+        painter.setPen(pen("black", 5))  # Border
+        painter.drawLine(QtCore.QLineF(0, -75, 0, -150))
+        painter.setPen(pen("white", 3))  # Fill
+        painter.drawLine(QtCore.QLineF(0, -75, 0, -150))
+
+        # Draw the smaller white triangle high on the line with a black border
+        painter.setPen(pen("black", 1))  # Border
+        painter.setBrush(brush("white"))  # Fill
+        painter.drawPolygon(needle_shape(((0, -116), (-15, -146), (15, -146))))
+        painter.restore()
+
+    def update_altitude(self, now):
+        changed = self.model.advance(now)
+
+        # Repaint only around needles whose tips visibly moved (or that came to rest); the sizes cover pen caps, arrowheads and rounding
+        tolerance = self.dirty.angle_tolerance if changed else lambda radius: 0
+        hundreds_angle, thousands_angle, ten_thousands_angle = self.needle_angles()
+        self.dirty.move("hundreds", hundreds_angle, lambda angle, margin: [needle_bounds(180, 180, math.radians(angle - 90), 130, 6, margin, tail=6)], tolerance(130))
+        self.dirty.move("thousands", thousands_angle, lambda angle, margin: [needle_bounds(180, 180, math.radians(angle - 90), 87, 6, margin, tail=6)], tolerance(87))
+        self.dirty.move("ten_thousands", ten_thousands_angle, lambda angle, margin: [needle_bounds(180, 180, math.radians(angle - 90), 154, 17, margin, tail=9)], tolerance(154))
+        return changed
+
+if __name__ == "__main__":
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    window = AltimeterWidget()
+    window.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,99 @@
+from PyQt5 import QtCore
+import math
+from frame_clock import shared_clock
+from layer_cache import LayerCache, Layer, instrument_transform, painter_scale
+from paint_resources import font, pen
+
+class Annunciator:
+    def __init__(self, name, text, rect, color="red", priority=0):
+        self.name = name
+        self.text = text
+        self.rect = QtCore.QRectF(rect)  # Design units
+        self.color = color  # Lit color; unlit lamps are drawn dark
+        self.priority = priority  # Decides which lamp shows when several share a position
+        self.on = False
+        self.blink_until = None  # Clock time the lamp blinks until, then goes off
+        self.lit = False  # State it was last invalidated for
+
+    def lit_at(self, now, blink_interval):
+        if self.blink_until is not None:
+            if now < self.blink_until:
+                # The phase comes from the clock time, so every blinking lamp on every instrument flashes together
+                return int(now / blink_interval) % 2 == 0
+            self.blink_until = None
+            self.on = False
+        return self.on
+
+class AnnunciatorPanel:
+    BLINK_INTERVAL = 0.5  # Seconds lit, then as long dark
+    OFF_COLOR = "#333"
+
+    def __init__(self, widget, clock=None):
+        self.widget = widget
+        self.clock = clock or shared_clock()
+        self.lamps = {}
+        self.blink_subscribed = False
+
+        # Lit and unlit sprites of every lamp, rendered once per size and device pixel ratio
+        self.sprites = LayerCache(max_entries=2)
+
+    def add(self, name, text, rect, color="red", priority=0):
+        self.lamps[name] = Annunciator(name, text, rect, color, priority)
+        return self.lamps[name]
+
+    def set(self, name, on):
+        # Steady on or off, cancelling any blinking
+        lamp = self.lamps[name]
+        lamp.on = on
+        lamp.blink_until = None
+        self.refresh(self.clock.frame_time)
+
+    def flash(self, name, now, duration=None):
+        # Blink from now for duration seconds (or until set() is called) and then go off
+        self.lamps[name].blink_until = now + duration if duration is not None else math.inf
+        if not self.blink_subscribed:
+            self.clock.subscribe(self.widget, self.refresh)
+            self.blink_subscribed = True
+        self.refresh(now)
+
+    def refresh(self, now):
+        # Invalidate only the lamps whose lit state changed
+        transform = instrument_transform(self.widget)
+        for lamp in self.lamps.values():
+            lit = lamp.lit_at(now, self.BLINK_INTERVAL)
+            if lit != lamp.lit:
+                lamp.lit = lit
+                self.widget.update(transform.mapRect(lamp.rect).toAlignedRect().adjusted(-1, -1, 1, 1))
+
+        if self.blink_subscribed and not any(lamp.blink_until is not None for lamp in self.lamps.values()):
+            self.clock.unsubscribe(self.widget, self.refresh)
+            self.blink_subscribed = False
+        return self.blink_subscribed  # Keeps the clock ticking while a lamp blinks
+
+    def paint(self, painter):
+        # One lamp per position: a lit lamp over a dark one, then the higher priority
+        shown = {}
+        for lamp in self.lamps.values():
+            key = lamp.rect.getRect()
+            current = shown.get(key)
+            if current is None or (lamp.lit, lamp.priority) > (current.lit, current.priority):
+                shown[key] = lamp
+
+        scale = painter_scale(painter)
+        sprites = self.sprites.get(scale, dict)
+        for lamp in shown.values():
+            key = (lamp.name, lamp.lit)
+            if key not in sprites:
+                sprites[key] = self.create_sprite(lamp, lamp.lit, scale)
+            sprites[key].draw(painter, lamp.rect.x(), lamp.rect.y())
+
+    def create_sprite(self, lamp, lit, scale):
+        sprite = Layer(lamp.rect.width(), lamp.rect.height(), scale)
+        painter = sprite.begin()
+        painter.setPen(pen(lamp.color if lit else self.OFF_COLOR, 2))
+        painter.setBrush(QtCore.Qt.NoBrush)
+        painter.drawRoundedRect(QtCore.QRectF(1, 1, lamp.rect.width() - 2, lamp.rect.height() - 2), 5, 5)
+        painter.setFont(font(pixel_size=18))
+        painter.drawText(QtCore.QRectF(0, 0, lamp.rect.width(), lamp.rect.height()), QtCore.Qt.AlignCenter, lamp.text)
+        painter.end()
+        return sprite
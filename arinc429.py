@@ -0,0 +1,191 @@
+import collections
+import math
+import socket
+import time
+import numpy as np
+from telemetry import TelemetryReceiver, TelemetrySample, demo_sample, parse_address
+
+# An ARINC 429 word as a 32-bit integer: bits 1-8 label (sent most significant bit first, so
+# reversed here), 9-10 SDI, 11-29 data, 30-31 SSM and 32 odd parity, where bit n is 1 << (n - 1)
+BNR = "BNR"  # Two's complement binary, sign in bit 29, most significant bit first from bit 28
+BCD = "BCD"  # Up to five decimal digits left-justified in bits 11-29, the top one 3 bits wide; sign in the SSM
+
+SSM_NORMAL = 3  # BNR normal operation; failure warning, no computed data and functional test are dropped
+SSM_PLUS = 0  # BCD plus, north, east, up...
+SSM_MINUS = 3  # BCD minus, south, west, down...
+
+FEET_PER_MINUTE = 0.3048 / 60  # In metres per second
+
+# Label decoded into a sample channel: encoding, significant bits (BNR) or digits (BCD), weight of the
+# least significant bit or digit, and the factor to the channel's unit
+Field = collections.namedtuple("Field", "channel encoding size resolution unit")
+
+LABELS = {
+    0o014: Field("heading", BCD, 4, 0.1, 1),  # Magnetic heading, 0-359.9 degrees
+    0o203: Field("altitude", BNR, 17, 1.0, 1),  # Pressure altitude, feet, range 131072
+    0o212: Field("vertical_speed", BNR, 11, 16.0, FEET_PER_MINUTE),  # Altitude rate, feet per minute, range 32768
+    0o320: Field("heading", BNR, 15, 180 / 2 ** 15, 1),  # Magnetic heading, degrees, range 180
+    0o324: Field("pitch", BNR, 14, 180 / 2 ** 14, 1),  # Pitch angle, degrees, range 180
+    0o325: Field("roll", BNR, 14, 180 / 2 ** 14, 1),  # Roll angle, degrees, range 180
+}
+
+CHANNELS = TelemetrySample._fields[1:]
+
+# Per-byte lookup tables, so whole buffers are reversed and parity-checked without a loop over words
+REVERSED_BYTES = np.array([int(f"{byte:08b}"[::-1], 2) for byte in range(256)], dtype=np.uint32)
+BYTE_PARITY = np.array([bin(byte).count("1") & 1 for byte in range(256)], dtype=np.uint8)
+
+# One array per field with an element per word. channel indexes CHANNELS (-1 for labels not in
+# LABELS); value is in the channel's unit, NaN where the word has no usable value.
+DecodedWords = collections.namedtuple("DecodedWords", "label sdi ssm channel value")
+
+def parity(words):
+    return (BYTE_PARITY[words & 0xFF] ^ BYTE_PARITY[(words >> 8) & 0xFF]
+            ^ BYTE_PARITY[(words >> 16) & 0xFF] ^ BYTE_PARITY[words >> 24])
+
+def decode(words):
+    # Words are decoded per label over the whole buffer; the Python loop only runs over LABELS
+    words = np.asarray(words, dtype=np.uint32)
+    label = REVERSED_BYTES[words & 0xFF].astype(np.uint16)
+    sdi = ((words >> 8) & 0x3).astype(np.uint8)
+    data = ((words >> 10) & 0x7FFFF).astype(np.int64)
+    ssm = ((words >> 29) & 0x3).astype(np.uint8)
+    intact = parity(words) == 1
+    channel = np.full(words.shape, -1, dtype=np.int8)
+    value = np.full(words.shape, np.nan)
+
+    for code, field in LABELS.items():
+        is_label = label == code
+        channel[is_label] = CHANNELS.index(field.channel)
+        if field.encoding == BNR:
+            indices = np.flatnonzero(is_label & intact & (ssm == SSM_NORMAL))
+            raw = data[indices] >> (18 - field.size)  # Sign and significant bits; the rest is padding
+            raw -= (raw >> field.size) << (field.size + 1)
+            value[indices] = raw * (field.resolution * field.unit)
+        else:
+            indices = np.flatnonzero(is_label & intact & ((ssm == SSM_PLUS) | (ssm == SSM_MINUS)))
+            fields = data[indices]
+            digits = [fields >> 16] + [(fields >> shift) & 0xF for shift in (12, 8, 4, 0)][:field.size - 1]
+            valid = np.all([digit <= 9 for digit in digits], axis=0)
+            number = np.zeros(len(indices), dtype=np.int64)
+            for digit in digits:
+                number = number * 10 + digit
+            sign = np.where(ssm[indices] == SSM_MINUS, -1, 1)
+            value[indices[valid]] = (sign * number * (field.resolution * field.unit))[valid]
+    return DecodedWords(label, sdi, ssm, channel, value)
+
+def latest_values(decoded):
+    # Newest usable value of every channel in a decoded buffer, NaN for channels it has none of
+    latest = np.full(len(CHANNELS), np.nan)
+    usable = np.flatnonzero(~np.isnan(decoded.value))[::-1]
+    channels, first = np.unique(decoded.channel[usable], return_index=True)
+    latest[channels] = decoded.value[usable[first]]
+    return latest
+
+def encode(labels, values, sdi=0):
+    # Words for arrays of labels (in LABELS) and values in their channel units, with normal SSM and odd parity
+    labels = np.asarray(labels, dtype=np.uint32)
+    values = np.asarray(values, dtype=np.float64)
+    data = np.zeros(labels.shape, dtype=np.uint32)
+    ssm = np.zeros(labels.shape, dtype=np.uint32)
+    for code, field in LABELS.items():
+        selected = labels == code
+        steps = np.round(values[selected] / (field.resolution * field.unit)).astype(np.int64)
+        if field.encoding == BNR:
+            steps = np.clip(steps, -(1 << field.size), (1 << field.size) - 1)
+            data[selected] = (steps & ((1 << (field.size + 1)) - 1)) << (18 - field.size)
+            ssm[selected] = SSM_NORMAL
+        else:
+            number = np.minimum(np.abs(steps), 10 ** field.size - 1)
+            packed = np.zeros(number.shape, dtype=np.int64)
+            for position, shift in enumerate((16, 12, 8, 4, 0)[:field.size]):
+                packed |= (number // 10 ** (field.size - 1 - position) % 10) << shift
+            data[selected] = packed
+            ssm[selected] = np.where(steps < 0, SSM_MINUS, SSM_PLUS)
+    words = REVERSED_BYTES[labels & 0xFF] | (np.uint32(sdi) << 8) | (data << 10) | (ssm << 29)
+    return words | ((parity(words) ^ 1).astype(np.uint32) << 31)
+
+def decode_capture(path):
+    # Bus capture file: little-endian 32-bit words, one after another
+    return decode(np.fromfile(path, dtype="<u4"))
+
+class ArincReceiver(TelemetryReceiver):
+    # Same as TelemetryReceiver, but each datagram holds any number of little-endian ARINC 429 words
+    def __init__(self, address, delay=0.0):
+        super().__init__(address, delay)
+        self.state = np.full(len(CHANNELS), np.nan)  # Newest value of every channel so far
+
+    def handle_packet(self, data, arrival):
+        if len(data) % 4:
+            self.dropped += 1
+            return
+        latest = latest_values(decode(np.frombuffer(data, dtype="<u4")))
+        timestamp = time.time()  # Words carry no time of their own
+
+        # Channels without a word in this datagram are NaN, so the interpolator only moves the others
+        if self.interpolator.push(TelemetrySample(timestamp, *latest.tolist()), arrival) and self.clock is not None:
+            self.clock.wake()
+
+        # The recorder gets complete samples, once every channel has been seen
+        np.copyto(self.state, latest, where=~np.isnan(latest))
+        if self.recorder is not None and not np.isnan(self.state).any():
+            self.recorder.record(TelemetrySample(timestamp, *self.state.tolist()))
+
+# Words per second of each label in the demo stream, roughly as a real bus schedules them
+DEMO_RATES = {0o324: 50, 0o325: 50, 0o320: 20, 0o212: 16, 0o203: 8}
+
+def send_demo(address, rate=50, duration=None):
+    # Stand-in for a bus capture: the telemetry demo flight as ARINC 429 words, rate datagrams per second
+    family, target = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    start = time.monotonic()
+    interval = 1 / rate
+    next_time = start
+    sent = dict.fromkeys(DEMO_RATES, 0)
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            t = time.monotonic() - start
+            sample = demo_sample(t, time.time())
+            values = {  # Same flight as telemetry.send_demo, in channel units
+                0o324: sample.pitch,
+                0o325: sample.roll,
+                0o320: (sample.heading + 180) % 360 - 180,
+                0o212: sample.vertical_speed,
+                0o203: sample.altitude,
+            }
+            # Every label whose schedule has come round since the last datagram
+            due = []
+            for label, label_rate in DEMO_RATES.items():
+                if sent[label] <= t * label_rate:
+                    due.append(label)
+                    sent[label] += 1
+            if due:
+                words = encode(due, [values[label] for label in due])
+                sock.sendto(words.astype("<u4").tobytes(), target)
+            next_time += interval
+            time.sleep(max(0, next_time - time.monotonic()))
+    finally:
+        sock.close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Decode ARINC 429 bus captures, or send a demo word stream")
+    parser.add_argument("capture", nargs="?", help="Capture file of little-endian 32-bit words to decode")
+    parser.add_argument("--send", metavar="ADDRESS", help="Send demo words to udp:HOST:PORT or unix:PATH instead")
+    parser.add_argument("--rate", type=float, default=50, help="Datagrams per second when sending")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to send for")
+    args = parser.parse_args()
+    if args.send:
+        send_demo(args.send, args.rate, args.duration)
+    elif args.capture:
+        start = time.perf_counter()
+        decoded = decode_capture(args.capture)
+        elapsed = time.perf_counter() - start
+        print(f"{len(decoded.value)} words in {elapsed:.3f} s ({len(decoded.value) / max(elapsed, 1e-9) / 1e6:.1f} M words/s)")
+        for code, field in LABELS.items():
+            words = decoded.label == code
+            usable = words & ~np.isnan(decoded.value)
+            if words.any():
+                print(f"label {code:03o} {field.channel:15} {words.sum():10d} words {usable.sum():10d} usable  last {decoded.value[usable][-1] if usable.any() else math.nan:.2f}")
+    else:
+        parser.error("give a capture file or --send ADDRESS")
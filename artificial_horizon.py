@@ -1,343 +1,301 @@
-from PyQt5 import QtWidgets, QtGui, QtCore
-import math
-
-class ArtificialHorizon(QtWidgets.QWidget):
-    def __init__(self, parent=None, sky_color="#4193F9", ground_color="#975B19"):
-        super().__init__(parent)
-        self.sky_color = sky_color
-        self.ground_color = ground_color
-        self.roll_angle = 0
-        self.pitch_angle = 0  # Add pitch angle for demonstration
-        self.pitch_direction = 1  # Add pitch direction for reversing
-        self.rotation_state = 0  # State of rotation
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.update_horizon)
-        self.timer.start(30)
-        self.rotation_timer = QtCore.QTimer(self)
-        self.rotation_timer.timeout.connect(self.toggle_rotation)
-        self.rotation_timer.start(10000)  # 10 seconds interval
-        self.setFixedSize(360, 360)
-        self.setContentsMargins(0, 0, 0, 0)  # Set margins to zero
-
-        # Create ALT label
-        self.blinking_label = QtWidgets.QLabel("ALT", self)
-        self.blinking_label.setStyleSheet("color: #333; background-color: transparent; border: 2px solid #333; border-radius: 5px; font-size: 18px;")
-        self.blinking_label.setAlignment(QtCore.Qt.AlignCenter)
-        self.blinking_label.setGeometry(20, 20, 50, 30)  # Adjust position and size
-        self.blinking_label.setVisible(True)  # Initially visible
-
-        self.blink_timer = QtCore.QTimer(self)
-        self.blink_timer.timeout.connect(self.toggle_label_color)
-
-        self.blink_cycle_timer = QtCore.QTimer(self)
-        self.blink_cycle_timer.timeout.connect(self.toggle_blinking_cycle)
-        self.blink_cycle_timer.start(15000)  # 15 seconds interval
-
-        self.blinking = False  # Initial state of blinking
-
-    def toggle_label_color(self):
-        current_color = self.blinking_label.styleSheet()
-        if "color: red" in current_color:
-            self.blinking_label.setStyleSheet("color: #333; background-color: transparent; border: 2px solid #333; border-radius: 5px; font-size: 18px;")
-        else:
-            self.blinking_label.setStyleSheet("color: red; background-color: transparent; border: 2px solid red; border-radius: 5px; font-size: 18px;")
-
-    def toggle_blinking_cycle(self):
-        self.blinking = not self.blinking
-        if self.blinking:
-            self.blink_timer.start(500)  # Start blinking
-            QtCore.QTimer.singleShot(5000, self.stop_blinking)  # Stop blinking after 5 seconds
-        else:
-            self.blinking_label.setStyleSheet("color: #333; background-color: transparent; border: 2px solid #333; border-radius: 5px; font-size: 18px;")
-
-    def stop_blinking(self):
-        self.blink_timer.stop()
-        self.blinking_label.setStyleSheet("color: #333; background-color: transparent; border: 2px solid #333; border-radius: 5px; font-size: 18px;")
-
-    def paintEvent(self, event):
-        painter = QtGui.QPainter(self)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
-
-        # Draw the rounded square background
-        rounded_rect_path = QtGui.QPainterPath()
-        rounded_rect_path.addRoundedRect(QtCore.QRectF(self.rect()), 30, 30)
-        painter.fillPath(rounded_rect_path, QtGui.QColor("#171717"))
-
-        # Draw the outer ellipse
-        painter.setPen(QtGui.QPen(QtGui.QColor("#444"), 5))
-        painter.drawEllipse(QtCore.QRectF(18, 18, 324, 324))  # Adjust the ellipse size and position
-
-        # Create an elliptical clipping path
-        ellipse_path = QtGui.QPainterPath()
-        ellipse_path.addEllipse(QtCore.QRectF(20, 20, 320, 320))  # Adjust the ellipse size and position
-
-        # Set the clipping path to the ellipse
-        painter.setClipPath(ellipse_path)
-
-        self.draw_horizon(painter)
-
-    def draw_horizon(self, painter):
-        width = self.width()
-        height = self.height()
-        center_x = width // 2
-        center_y = height // 2
-
-        # Calculate vertical offset based on pitch angle and invert it
-        pitch_offset = int(-self.pitch_angle * height / 90)  # Adjust the divisor for sensitivity
-
-        # Define rectangles for the sky and ground with pitch offset
-        sky_points = [
-            QtCore.QPoint(center_x - width, center_y - height + pitch_offset),
-            QtCore.QPoint(center_x + width, center_y - height + pitch_offset),
-            QtCore.QPoint(center_x + width, center_y + pitch_offset),
-            QtCore.QPoint(center_x - width, center_y + pitch_offset)
-        ]
-
-        ground_points = [
-            QtCore.QPoint(center_x - width, center_y + pitch_offset),
-            QtCore.QPoint(center_x + width, center_y + pitch_offset),
-            QtCore.QPoint(center_x + width, center_y + height + pitch_offset),
-            QtCore.QPoint(center_x - width, center_y + height + pitch_offset)
-        ]
-
-        # Rotate points
-        roll_radians = math.radians(self.roll_angle)
-        def rotate_point(point, angle, cx, cy):
-            s = math.sin(angle)
-            c = math.cos(angle)
-            x = point.x() - cx
-            y = point.y() - cy
-            new_x = x * c - y * s
-            new_y = x * s + y * c
-            return QtCore.QPoint(int(new_x + cx), int(new_y + cy))
-
-        rotated_sky_points = [rotate_point(point, roll_radians, center_x, center_y) for point in sky_points]
-        rotated_ground_points = [rotate_point(point, roll_radians, center_x, center_y) for point in ground_points]
-
-        # Create gradient for the sky
-        sky_gradient = QtGui.QLinearGradient(0, center_y - height + pitch_offset, 0, center_y + pitch_offset)
-        sky_gradient.setColorAt(0, QtGui.QColor("#2A6EC9"))  # Top color
-        sky_gradient.setColorAt(1, QtGui.QColor("#7CB5EB"))  # Bottom color
-
-        # Create gradient for the ground
-        ground_gradient = QtGui.QLinearGradient(0, center_y + pitch_offset, 0, center_y + height + pitch_offset)
-        ground_gradient.setColorAt(0, QtGui.QColor("#975B19"))  # Top color
-        ground_gradient.setColorAt(1, QtGui.QColor("#654321"))  # Bottom color
-
-        # Draw the sky with gradient
-        painter.setBrush(sky_gradient)
-        painter.setPen(QtCore.Qt.NoPen)
-        painter.drawPolygon(QtGui.QPolygon(rotated_sky_points))
-
-        # Draw the ground with gradient
-        painter.setBrush(ground_gradient)
-        painter.drawPolygon(QtGui.QPolygon(rotated_ground_points))
-
-        # Draw the separator line between sky and ground
-        painter.setPen(QtGui.QPen(QtCore.Qt.gray, 1))
-        painter.drawLine(rotated_sky_points[2], rotated_sky_points[3])
-
-        # Draw pitch lines and pitch ladder
-        self.draw_pitch_lines_and_ladder(painter, center_x, center_y)
-
-        # Draw bank angle arc with tick marks
-        self.draw_bank_angle_arc(painter, center_x, center_y)
-
-        # Define the L-shaped plane outline points
-        left_L = [
-            QtCore.QPoint(center_x - 144, center_y - 5), QtCore.QPoint(center_x - 84, center_y - 5),
-            QtCore.QPoint(center_x - 84, center_y - 5), QtCore.QPoint(center_x - 74, center_y - 5),
-            QtCore.QPoint(center_x - 74, center_y + 22), QtCore.QPoint(center_x - 84, center_y + 22),
-            QtCore.QPoint(center_x - 84, center_y + 5), QtCore.QPoint(center_x - 144, center_y + 5)
-        ]
-
-        right_L = [
-            QtCore.QPoint(center_x + 144, center_y - 5), QtCore.QPoint(center_x + 84, center_y - 5),
-            QtCore.QPoint(center_x + 84, center_y - 5), QtCore.QPoint(center_x + 74, center_y - 5),
-            QtCore.QPoint(center_x + 74, center_y + 22), QtCore.QPoint(center_x + 84, center_y + 22),
-            QtCore.QPoint(center_x + 84, center_y + 5), QtCore.QPoint(center_x + 144, center_y + 5)
-        ]
-
-        # Draw plane outline
-        painter.setPen(QtGui.QPen(QtGui.QColor("yellow"), 3))
-        painter.setBrush(QtGui.QColor("black"))
-        painter.drawPolygon(QtGui.QPolygon(left_L))
-        painter.drawPolygon(QtGui.QPolygon(right_L))
-
-        # Draw smaller square at the center
-        square_size = 10
-        painter.drawRect(center_x - square_size // 2, center_y - square_size // 2, square_size, square_size)
-
-        # Update roll angle and pitch angle for demonstration
-        if self.rotation_state == 1:  # Rotate to +20 degrees
-            self.roll_angle += 0.2
-            if self.roll_angle >= 20:
-                self.rotation_state = 2
-        elif self.rotation_state == 2:  # Rotate to -20 degrees
-            self.roll_angle -= 0.2
-            if self.roll_angle <= -20:
-                self.rotation_state = 3
-        elif self.rotation_state == 3:  # Return to initial state
-            self.roll_angle += 0.2
-            if self.roll_angle >= 0:
-                self.roll_angle = 0
-                self.rotation_state = 0
-
-        self.pitch_angle += 0.2 * self.pitch_direction
-        if self.pitch_angle >= 30 or self.pitch_angle <= -30:
-            self.pitch_direction *= -1
-
-    def draw_bank_angle_arc(self, painter, center_x, center_y):
-        # Draw the arc at the top of the container circle
-        arc_rect = QtCore.QRect(center_x - 145, center_y - 145, 290, 290)
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 2))
-        painter.drawArc(arc_rect, 60 * 16, 60 * 16)  # Draw arc from -30 to +30 degrees
-
-        # Draw tick marks for bank angles (rotated rectangles)
-        for angle in range(-30, 31, 10):
-            tick_length = 14 if angle % 30 == 0 else 10  # Adjust rectangles' size
-            tick_angle = math.radians(angle - 90)  # Adjust angle to align with the top arc
-            x1 = center_x + 158 * math.cos(tick_angle)
-            y1 = center_y + 158 * math.sin(tick_angle)
-            x2 = center_x + (158 - tick_length) * math.cos(tick_angle)
-            y2 = center_y + (158 - tick_length) * math.sin(tick_angle)
-            
-            if angle == 0:
-                # Define points for the inverted yellow triangle
-                triangle_points = [
-                    QtCore.QPoint(int((x1 + x2) / 2), int(y2)),
-                    QtCore.QPoint(int((x1 + x2) / 2 - 8), int(y1)),
-                    QtCore.QPoint(int((x1 + x2) / 2 + 8), int(y1))
-                ]
-                painter.setPen(QtGui.QPen(QtGui.QColor("yellow"), 2))
-                painter.setBrush(QtCore.Qt.NoBrush)
-                painter.drawPolygon(QtGui.QPolygon(triangle_points))
-            else:
-                # Define the rectangle for the tick mark
-                rect_width = 6  # Width of the rectangle
-                painter.setPen(QtGui.QPen(QtGui.QColor("white"), 2))
-                rect_height = abs(y1 - y2)  # Height of the rectangle
-                rect_center_x = (x1 + x2) / 2
-                rect_center_y = (y1 + y2) / 2
-                
-                # Create the rectangle centered on the arc
-                rect = QtCore.QRectF(rect_center_x - rect_width / 2, rect_center_y - rect_height / 2, rect_width, rect_height)
-                
-                # Create a QTransform object to apply rotation
-                transform = QtGui.QTransform()
-                transform.translate(rect_center_x, rect_center_y)
-                transform.rotate(angle)
-                transform.translate(-rect_center_x, -rect_center_y)
-                
-                # Apply the transformation and draw the rectangle with no fill
-                painter.setTransform(transform)
-                painter.setBrush(QtCore.Qt.NoBrush)
-                painter.drawRect(rect)
-                painter.resetTransform()  # Reset transformation for the next tick mark
-
-        # Draw the moving trapezoid and triangle
-        triangle_angle = math.radians(-self.roll_angle - 90)  # Adjust angle to align with the top arc
-        triangle_x = int(center_x + 140 * math.cos(triangle_angle))
-        triangle_y = int(center_y + 140 * math.sin(triangle_angle))
-
-        # Define points for the inverted trapezoid
-        trapezoid_points = [
-            QtCore.QPoint(triangle_x - 12, triangle_y + 18),
-            QtCore.QPoint(triangle_x + 12, triangle_y + 18),
-            QtCore.QPoint(triangle_x + 16, triangle_y + 25),
-            QtCore.QPoint(triangle_x - 16, triangle_y + 25)
-        ]
-
-        # Define points for the triangle
-        triangle_points = [
-            QtCore.QPoint(triangle_x, triangle_y),
-            QtCore.QPoint(triangle_x - 10, triangle_y + 14),
-            QtCore.QPoint(triangle_x + 10, triangle_y + 14)
-        ]
-
-        # Draw the trapezoid and triangle with yellow outline and no fill
-        painter.setPen(QtGui.QPen(QtGui.QColor("yellow"), 2))
-        painter.setBrush(QtCore.Qt.NoBrush)
-        painter.drawPolygon(QtGui.QPolygon(trapezoid_points))
-        painter.drawPolygon(QtGui.QPolygon(triangle_points))
-
-        # Draw the horizontal yellow line
-        line_y = triangle_y + 34  # Adjust the position as needed
-        painter.setPen(QtGui.QPen(QtGui.QColor("yellow"), 2))
-        painter.drawLine(center_x - 150, line_y, center_x + 150, line_y)
-
-        # Draw the horizontal white line
-        white_line_y = center_y + 106  # Adjust the position as needed
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 2))
-        painter.drawLine(center_x - 150, white_line_y, center_x + 150, white_line_y)
-
-    def draw_pitch_lines_and_ladder(self, painter, center_x, center_y):
-        pitch_angles = [-30, -27.5, -25, -22.5, -20, -17.5, -15, -12.5, -10, -7.5, -5, -2.5, 0, 2.5, 5, 7.5, 10, 12.5, 15, 17.5, 20, 22.5, 25, 27.5, 30]
-        ellipse_radius = 160  # Half of the ellipse size = (320 / 2)
-        fade_start_distance = ellipse_radius * 0.55  # Start fading at 55% of the radius
-
-        # Define the top and bottom limits for the pitch ladder
-        top_limit = center_y - 100  # Adjust this value as needed
-        bottom_limit = center_y + 100  # Adjust this value as needed
-
-        for i, pitch in enumerate(pitch_angles):
-            y = int(center_y - (pitch + self.pitch_angle) * 8)  # Controls vertical spacing between lines
-
-            # Skip drawing lines outside the top and bottom limits
-            if y < top_limit or y > bottom_limit:
-                continue
-
-            distance_from_center = abs(y - center_y)
-            if distance_from_center < fade_start_distance:
-                fade_factor = 1
-            else:
-                fade_factor = max(0, 1 - (distance_from_center - fade_start_distance) / (ellipse_radius - fade_start_distance))
-
-            # Adjust fade factor based on proximity to the top and bottom limits
-            if y < top_limit + 20:
-                fade_factor *= (y - top_limit) / 20
-            elif y > bottom_limit - 20:
-                fade_factor *= (bottom_limit - y) / 20
-
-            line_length = int(34 * fade_factor)  # Pitch line length
-            opacity = int(255 * fade_factor)
-
-            painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 255, opacity), 2))
-            font = QtGui.QFont()
-            font.setPointSize(12)  # Increase font size
-            painter.setFont(font)
-            if pitch % 10 == 0:  # Long lines with labels
-                painter.drawLine(center_x - line_length, y, center_x + line_length, y)
-                painter.drawText(center_x - 64, y + 5, f"{pitch:>3}")  # Move numbers closer
-                painter.drawText(center_x + 40, y + 5, f"{pitch:<3}")  # Move numbers closer
-            elif pitch % 5 == 0:  # Medium lines
-                painter.drawLine(center_x - int(line_length // 1.5), y, center_x + int(line_length // 1.5), y)
-            else:  # Short lines
-                painter.drawLine(center_x - line_length // 2, y, center_x + line_length // 2, y)
-
-    def toggle_rotation(self):
-        self.rotation_state = 1  # Start the rotation cycle
-
-    def update_horizon(self):
-        if self.rotation_state == 1:  # Rotate to +20 degrees
-            self.roll_angle += 0.2
-            if self.roll_angle >= 20:
-                self.rotation_state = 2
-        elif self.rotation_state == 2:  # Rotate to -20 degrees
-            self.roll_angle -= 0.2
-            if self.roll_angle <= -20:
-                self.rotation_state = 3
-        elif self.rotation_state == 3:  # Return to initial state
-            self.roll_angle += 0.2
-            if self.roll_angle >= 0:
-                self.roll_angle = 0
-                self.rotation_state = 0
-
-        self.update()
-
-if __name__ == "__main__":
-    import sys
-    app = QtWidgets.QApplication(sys.argv)
-    window = ArtificialHorizon()
-    window.show()
-    sys.exit(app.exec_())
+from PyQt5 import QtWidgets, QtGui, QtCore
+import math
+from annunciator import AnnunciatorPanel
+from dial_geometry import needle_shape, radial_box_lines
+from dirty_region import IDLE_PIXELS, DirtyRegions, disc_polygon
+from frame_clock import shared_clock
+from instrument_models import HorizonModel
+from layer_cache import DESIGN_SIZE, Layer, LayerCache, paint_instrument, painter_scale
+from paint_resources import brush, ellipse_path, font, linear_gradient, pen, rounded_rect_path
+
+class ArtificialHorizon(QtWidgets.QWidget):
+    PROFILED_METHODS = ("paintEvent", "draw_horizon", "draw_pitch_lines_and_ladder", "draw_bank_angle_arc")  # Timed by the diagnostics overlay when enabled
+    LADDER_STRIP_MARGIN = 120  # Room above +30 and below -30 so the window never runs off the strip
+    LADDER_STRIP_HEIGHT = 480 + 2 * LADDER_STRIP_MARGIN  # 60 degrees at 8 pixels per degree
+    LADDER_WINDOW_HALF_HEIGHT = 100  # Ladder is visible 100 pixels above and below the center
+    WINDOW_RADIUS = 160
+    BALL_HALF_WIDTH = 170  # Attitude ball texture, enough to cover the window at any roll
+    BALL_HALF_HEIGHT = DESIGN_SIZE  # Where the sky and ground gradients end; beyond it they are filled flat
+    SKY_COLORS = ("#2A6EC9", "#7CB5EB")  # Top and bottom of the sky gradient
+    GROUND_COLORS = ("#975B19", "#654321")  # Top and bottom of the ground gradient
+
+    def __init__(self, parent=None, sky_color="#4193F9", ground_color="#975B19", clock=None):
+        super().__init__(parent)
+        self.sky_color = sky_color
+        self.ground_color = ground_color
+        self.model = HorizonModel()
+        self.clock = clock or shared_clock()
+        self.clock.subscribe(self, self.update_horizon, 30)
+        self.clock.subscribe(self, self.toggle_rotation, 10000, scheduled=True)  # 10 seconds interval
+        self.setMinimumSize(150, 150)
+        self.setContentsMargins(0, 0, 0, 0)  # Set margins to zero
+
+        # Alert lamps painted with the instrument; ALT blinks for 5 seconds out of every 30
+        self.annunciators = AnnunciatorPanel(self, self.clock)
+        self.annunciators.add("ALT", "ALT", QtCore.QRectF(20, 20, 50, 30))
+        self.clock.subscribe(self, self.toggle_blinking_cycle, 15000, scheduled=True)  # 15 seconds interval
+        self.blinking = False  # Initial state of blinking
+
+        # Attitude ball, pitch ladder strip and its edge fade mask, rendered once per size and device pixel ratio
+        self.layers = LayerCache(max_entries=8)
+        self.window_path = ellipse_path(20, 20, 320, 320)  # Adjust the ellipse size and position
+        self.dirty = DirtyRegions(self)
+        self.frame = None  # Finished image from a render thread, blitted instead of painting (threaded_render)
+
+    def sizeHint(self):
+        return QtCore.QSize(DESIGN_SIZE, DESIGN_SIZE)
+
+    def toggle_blinking_cycle(self, now):
+        self.blinking = not self.blinking
+        if self.blinking:
+            self.annunciators.flash("ALT", now, 5)  # Stop blinking after 5 seconds
+        else:
+            self.annunciators.set("ALT", False)
+
+    def paintEvent(self, event):
+        paint_instrument(self)
+
+    def paint(self, painter):
+        # Draws in design units; also used to paint fleet view tiles
+
+        # Draw the rounded square background
+        painter.fillPath(rounded_rect_path(0, 0, DESIGN_SIZE, DESIGN_SIZE, 30), brush("#171717"))
+
+        # Draw the outer ellipse
+        painter.setPen(pen("#444", 5))
+        painter.drawEllipse(QtCore.QRectF(18, 18, 324, 324))  # Adjust the ellipse size and position
+
+        # Clip to the elliptical window, built once
+        painter.setClipPath(self.window_path)
+
+        self.draw_horizon(painter)
+
+        # Alert lamps sit outside the window, over the corner of the background
+        painter.setClipping(False)
+        self.annunciators.paint(painter)
+
+    def draw_horizon(self, painter):
+        width = DESIGN_SIZE
+        height = DESIGN_SIZE
+        center_x = width // 2
+        center_y = height // 2
+
+        # Calculate vertical offset based on pitch angle and invert it
+        pitch_offset = -self.model.pitch_angle * height / 90  # Adjust the divisor for sensitivity
+
+        # Draw the pre-rendered sky and ground with one blit, shifted by pitch and rotated by roll around the center
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.translate(center_x, center_y)
+        painter.rotate(self.model.roll_angle)
+        painter.translate(0, pitch_offset)
+
+        # Beyond 50 degrees of pitch the window reaches past the texture, where the gradients have ended in flat colors.
+        # The fills start under the texture edge, so no seam shows between them.
+        reach = abs(pitch_offset) + self.WINDOW_RADIUS - self.BALL_HALF_HEIGHT
+        if reach > 0:
+            painter.fillRect(QtCore.QRectF(-self.BALL_HALF_WIDTH, -self.BALL_HALF_HEIGHT - reach, 2 * self.BALL_HALF_WIDTH, reach + 2), brush(self.SKY_COLORS[0]))
+            painter.fillRect(QtCore.QRectF(-self.BALL_HALF_WIDTH, self.BALL_HALF_HEIGHT - 2, 2 * self.BALL_HALF_WIDTH, reach + 2), brush(self.GROUND_COLORS[1]))
+        self.get_ball_layer(painter_scale(painter)).draw(painter, -self.BALL_HALF_WIDTH, -self.BALL_HALF_HEIGHT)
+        painter.restore()
+
+        # Draw pitch lines and pitch ladder
+        self.draw_pitch_lines_and_ladder(painter, center_x, center_y)
+
+        # Draw bank angle arc with tick marks
+        self.draw_bank_angle_arc(painter, center_x, center_y)
+
+        # Define the L-shaped plane outline points
+        left_L = [
+            QtCore.QPoint(center_x - 144, center_y - 5), QtCore.QPoint(center_x - 84, center_y - 5),
+            QtCore.QPoint(center_x - 84, center_y - 5), QtCore.QPoint(center_x - 74, center_y - 5),
+            QtCore.QPoint(center_x - 74, center_y + 22), QtCore.QPoint(center_x - 84, center_y + 22),
+            QtCore.QPoint(center_x - 84, center_y + 5), QtCore.QPoint(center_x - 144, center_y + 5)
+        ]
+
+        right_L = [
+            QtCore.QPoint(center_x + 144, center_y - 5), QtCore.QPoint(center_x + 84, center_y - 5),
+            QtCore.QPoint(center_x + 84, center_y - 5), QtCore.QPoint(center_x + 74, center_y - 5),
+            QtCore.QPoint(center_x + 74, center_y + 22), QtCore.QPoint(center_x + 84, center_y + 22),
+            QtCore.QPoint(center_x + 84, center_y + 5), QtCore.QPoint(center_x + 144, center_y + 5)
+        ]
+
+        # Draw plane outline
+        painter.setPen(pen("yellow", 3))
+        painter.setBrush(brush("black"))
+        painter.drawPolygon(QtGui.QPolygon(left_L))
+        painter.drawPolygon(QtGui.QPolygon(right_L))
+
+        # Draw smaller square at the center
+        square_size = 10
+        painter.drawRect(center_x - square_size // 2, center_y - square_size // 2, square_size, square_size)
+
+    def draw_bank_angle_arc(self, painter, center_x, center_y):
+        # Draw the arc at the top of the container circle
+        arc_rect = QtCore.QRect(center_x - 145, center_y - 145, 290, 290)
+        painter.setPen(pen("white", 2))
+        painter.drawArc(arc_rect, 60 * 16, 60 * 16)  # Draw arc from -30 to +30 degrees
+
+        # Draw tick marks for bank angles as 6 units wide rectangles, longer at 30 degrees
+        painter.setPen(pen("white", 2))
+        painter.drawLines(radial_box_lines((-20, -10, 10, 20), 148, 158, 6) + radial_box_lines((-30, 30), 144, 158, 6))
+
+        # Draw the inverted yellow triangle at 0 degrees; it never turns, so the cached shape is drawn as is
+        painter.save()
+        painter.translate(center_x, center_y)
+        painter.setPen(pen("yellow", 2))
+        painter.setBrush(QtCore.Qt.NoBrush)
+        painter.drawPolygon(needle_shape(((0, -144), (-8, -158), (8, -158))))
+        painter.restore()
+
+        # Draw the moving trapezoid and triangle
+        triangle_angle = math.radians(-self.model.roll_angle - 90)  # Adjust angle to align with the top arc
+        triangle_x = int(center_x + 140 * math.cos(triangle_angle))
+        triangle_y = int(center_y + 140 * math.sin(triangle_angle))
+
+        # Define points for the inverted trapezoid
+        trapezoid_points = [
+            QtCore.QPoint(triangle_x - 12, triangle_y + 18),
+            QtCore.QPoint(triangle_x + 12, triangle_y + 18),
+            QtCore.QPoint(triangle_x + 16, triangle_y + 25),
+            QtCore.QPoint(triangle_x - 16, triangle_y + 25)
+        ]
+
+        # Define points for the triangle
+        triangle_points = [
+            QtCore.QPoint(triangle_x, triangle_y),
+            QtCore.QPoint(triangle_x - 10, triangle_y + 14),
+            QtCore.QPoint(triangle_x + 10, triangle_y + 14)
+        ]
+
+        # Draw the trapezoid and triangle with yellow outline and no fill
+        painter.setPen(pen("yellow", 2))
+        painter.setBrush(QtCore.Qt.NoBrush)
+        painter.drawPolygon(QtGui.QPolygon(trapezoid_points))
+        painter.drawPolygon(QtGui.QPolygon(triangle_points))
+
+        # Draw the horizontal yellow line
+        line_y = triangle_y + 34  # Adjust the position as needed
+        painter.setPen(pen("yellow", 2))
+        painter.drawLine(center_x - 150, line_y, center_x + 150, line_y)
+
+        # Draw the horizontal white line
+        white_line_y = center_y + 106  # Adjust the position as needed
+        painter.setPen(pen("white", 2))
+        painter.drawLine(center_x - 150, white_line_y, center_x + 150, white_line_y)
+
+    def get_ball_layer(self, scale):
+        return self.layers.get(("ball", scale), lambda: self.create_ball_layer(scale))
+
+    def create_ball_layer(self, scale):
+        # Sky above and ground below a horizon through the layer's center
+        width = 2 * self.BALL_HALF_WIDTH
+        height = 2 * self.BALL_HALF_HEIGHT
+        ball = Layer(width, height, scale)
+        painter = ball.begin()
+        painter.translate(self.BALL_HALF_WIDTH, self.BALL_HALF_HEIGHT)
+        painter.setPen(QtCore.Qt.NoPen)
+
+        # Gradients span a full design size on either side of the horizon, the whole height of the texture
+        sky_gradient = linear_gradient(0, -DESIGN_SIZE, 0, 0, ((0, self.SKY_COLORS[0]), (1, self.SKY_COLORS[1])))
+        painter.fillRect(QtCore.QRectF(-self.BALL_HALF_WIDTH, -self.BALL_HALF_HEIGHT, width, self.BALL_HALF_HEIGHT), sky_gradient)
+
+        ground_gradient = linear_gradient(0, 0, 0, DESIGN_SIZE, ((0, self.GROUND_COLORS[0]), (1, self.GROUND_COLORS[1])))
+        painter.fillRect(QtCore.QRectF(-self.BALL_HALF_WIDTH, 0, width, self.BALL_HALF_HEIGHT), ground_gradient)
+
+        # Draw the separator line between sky and ground
+        painter.setPen(pen(QtCore.Qt.gray, 1))
+        painter.drawLine(QtCore.QLineF(-self.BALL_HALF_WIDTH, 0, self.BALL_HALF_WIDTH, 0))
+        painter.end()
+        return ball
+
+    def get_ladder_images(self, scale):
+        return self.layers.get(("ladder", scale), lambda: self.create_ladder_images(scale))
+
+    def create_ladder_images(self, scale):
+        width = DESIGN_SIZE
+        center_x = width // 2
+        pitch_angles = [-30, -27.5, -25, -22.5, -20, -17.5, -15, -12.5, -10, -7.5, -5, -2.5, 0, 2.5, 5, 7.5, 10, 12.5, 15, 17.5, 20, 22.5, 25, 27.5, 30]
+        line_length = 34  # Pitch line length
+
+        # Tall strip with every ladder line from +30 (top) to -30 (bottom) at full opacity
+        strip = Layer(width, self.LADDER_STRIP_HEIGHT, scale)
+        painter = strip.begin()
+        painter.setPen(pen("white", 2))
+        painter.setFont(font(point_size=12))  # Increase font size
+        for pitch in pitch_angles:
+            y = int(self.LADDER_STRIP_MARGIN + (30 - pitch) * 8)  # Controls vertical spacing between lines
+            if pitch % 10 == 0:  # Long lines with labels
+                painter.drawLine(center_x - line_length, y, center_x + line_length, y)
+                painter.drawText(center_x - 64, y + 5, f"{pitch:>3}")  # Move numbers closer
+                painter.drawText(center_x + 40, y + 5, f"{pitch:<3}")  # Move numbers closer
+            elif pitch % 5 == 0:  # Medium lines
+                painter.drawLine(center_x - int(line_length // 1.5), y, center_x + int(line_length // 1.5), y)
+            else:  # Short lines
+                painter.drawLine(center_x - line_length // 2, y, center_x + line_length // 2, y)
+        painter.end()
+
+        # Alpha mask for the visible window, fading towards the ellipse edge and the window limits
+        ellipse_radius = 160  # Half of the ellipse size = (320 / 2)
+        fade_start_distance = ellipse_radius * 0.55  # Start fading at 55% of the radius
+        window_height = 2 * self.LADDER_WINDOW_HALF_HEIGHT
+        mask = Layer(width, window_height, scale)
+        painter = mask.begin()
+        for row in range(mask.image.height()):
+            offset = row / scale  # Distance from the top limit in design units
+            distance_from_center = abs(offset - self.LADDER_WINDOW_HALF_HEIGHT)
+            if distance_from_center < fade_start_distance:
+                fade_factor = 1
+            else:
+                fade_factor = max(0, 1 - (distance_from_center - fade_start_distance) / (ellipse_radius - fade_start_distance))
+
+            # Adjust fade factor based on proximity to the top and bottom limits
+            if offset < 20:
+                fade_factor *= offset / 20
+            elif offset > window_height - 20:
+                fade_factor *= (window_height - offset) / 20
+
+            painter.fillRect(QtCore.QRectF(0, offset, width, 1 / scale), QtGui.QColor(255, 255, 255, int(255 * fade_factor)))
+        painter.end()
+
+        # Scratch image the visible window is composed in every frame
+        window = Layer(width, window_height, scale)
+        return strip, mask, window
+
+    def draw_pitch_lines_and_ladder(self, painter, center_x, center_y):
+        strip, mask, window = self.get_ladder_images(painter_scale(painter))
+        width = DESIGN_SIZE
+        window_height = 2 * self.LADDER_WINDOW_HALF_HEIGHT
+
+        # Strip row that lines up with the top limit of the window at the current pitch
+        top_limit = center_y - self.LADDER_WINDOW_HALF_HEIGHT
+        strip_top = self.LADDER_STRIP_MARGIN + (30 + self.model.pitch_angle) * 8 - self.LADDER_WINDOW_HALF_HEIGHT
+
+        # Copy the visible window out of the strip and apply the cached fade mask
+        window.image.fill(QtCore.Qt.transparent)
+        window_painter = window.begin()
+        window_painter.drawImage(QtCore.QRectF(0, 0, width, window_height), strip.image, strip.source_rect(0, strip_top, width, window_height))
+        window_painter.setCompositionMode(QtGui.QPainter.CompositionMode_DestinationIn)
+        mask.draw(window_painter)
+        window_painter.end()
+
+        window.draw(painter, 0, top_limit)
+
+    def toggle_rotation(self, now):
+        self.model.start_rotation()  # Start the rotation cycle
+
+    def update_horizon(self, now):
+        changed = self.model.advance(now)
+
+        # Everything that moves is clipped to the ball inside the bezel; it is repainted once its rim or the
+        # horizon line visibly moved, and exactly when it comes to rest
+        tolerance = (self.dirty.angle_tolerance(160), IDLE_PIXELS * self.dirty.pixel_size() / (DESIGN_SIZE / 90)) if changed else 0
+        self.dirty.move("ball", (self.model.roll_angle, self.model.pitch_angle), lambda attitude, margin: [disc_polygon(180, 180, 160, margin)], tolerance)
+        return changed
+
+if __name__ == "__main__":
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    window = ArtificialHorizon()
+    window.show()
+    sys.exit(app.exec_())
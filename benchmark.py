@@ -0,0 +1,124 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtWidgets, QtGui, QtCore
+import paint_resources
+from instrument_registry import INSTRUMENTS, instrument_class
+from telemetry import TelemetrySample
+
+def sweep_sample(i, frames):
+    # Walk every instrument across its whole range over the run
+    phase = i / max(1, frames - 1)
+    wave = math.sin(phase * 2 * math.pi)
+    return TelemetrySample(
+        timestamp=i,
+        roll=30 * wave,
+        pitch=30 * math.sin(phase * 4 * math.pi),
+        heading=360 * phase,
+        altitude=100000 * phase,
+        vertical_speed=6 * wave,
+    )
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_case(widget_class, size, frames, warmup):
+    widget = widget_class()
+    widget.setFixedSize(size, size)
+    image = QtGui.QImage(size, size, QtGui.QImage.Format_ARGB32_Premultiplied)
+
+    def paint(i):
+        widget.model.apply(sweep_sample(i, frames))
+        image.fill(QtCore.Qt.black)
+        widget.render(image)
+
+    # Warm up first so one-off layer caches are not counted as frame cost
+    for i in range(warmup):
+        paint(i)
+
+    # Shared pens, brushes, fonts and gradients are all built by now; a steady frame builds none
+    built_before = paint_resources.built_count()
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        paint(i)
+        times.append((time.perf_counter() - start) * 1000)
+    resources_built = paint_resources.built_count() - built_before
+
+    # Allocation is measured in a separate pass, tracemalloc slows painting down a lot
+    allocated = []
+    tracemalloc.start()
+    for i in range(frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        paint(i)
+        allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    widget.deleteLater()
+    mean = sum(times) / len(times)
+    return {
+        "mean_ms": mean,
+        "p99_ms": percentile(times, 0.99),
+        "fps": 1000 / mean if mean else float("inf"),
+        "bytes_per_frame": sum(allocated) / len(allocated),
+        "resources_per_frame": resources_built / frames,
+    }
+
+def compare(results, baseline, threshold):
+    # A case regresses when its mean or p99 paint time grows by more than threshold
+    regressions = []
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        for metric in ("mean_ms", "p99_ms"):
+            limit = baseline[case][metric] * (1 + threshold)
+            if result[metric] > limit:
+                regressions.append(f"{case} {metric}: {result[metric]:.3f} ms > {limit:.3f} ms (baseline {baseline[case][metric]:.3f} ms)")
+        if result.get("resources_per_frame"):
+            regressions.append(f"{case} builds {result['resources_per_frame']:.2f} paint resources per frame, expected none")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark instrument painting offscreen")
+    parser.add_argument("--instruments", nargs="+", choices=sorted(INSTRUMENTS), default=list(INSTRUMENTS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[180, 360, 720], help="Widget sizes in pixels")
+    parser.add_argument("--frames", type=int, default=200, help="Frames per instrument and size")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed frames before measuring")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Fail if results regress against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    results = {}
+    for name in args.instruments:
+        widget_class = instrument_class(name)
+        for size in args.sizes:
+            case = f"{name}@{size}"
+            results[case] = run_case(widget_class, size, args.frames, args.warmup)
+            result = results[case]
+            print(f"{case:16} mean {result['mean_ms']:7.3f} ms  p99 {result['p99_ms']:7.3f} ms  "
+                  f"{result['fps']:8.1f} fps  {result['bytes_per_frame']:9.0f} B/frame  {result['resources_per_frame']:5.2f} resources/frame")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
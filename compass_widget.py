@@ -1,182 +1,185 @@
-from PyQt5 import QtWidgets, QtGui, QtCore
-import math
-
-class CompassWidget(QtWidgets.QWidget):
-    def __init__(self, parent=None, compass_color="#FFFFFF"):
-        super().__init__(parent)
-        self.heading_angle = 0
-        self.rotation_direction = 1  # 1 for clockwise, -1 for counterclockwise
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.update_compass)
-        self.timer.start(30)  # Update interval at 30 milliseconds
-        self.setFixedSize(360, 360)
-        self.setContentsMargins(0, 0, 0, 0)
-
-        # Add QLabel to display the angle and direction
-        self.angle_label = QtWidgets.QLabel(self)
-        self.angle_label.setStyleSheet("color: white; font-size: 24px;")
-        self.angle_label.setAlignment(QtCore.Qt.AlignCenter)
-        self.update_angle_label()
-
-        # Pre-render direction labels as images
-        self.direction_images = self.create_direction_images()
-        # Pre-render degree labels as images
-        self.degree_images = self.create_degree_images()
-
-    def create_direction_images(self):
-        directions = ["N", "E", "S", "W"]
-        images = {}
-        font = QtGui.QFont()
-        font.setPointSize(18)
-        font.setBold(True)
-        for direction in directions:
-            image = QtGui.QImage(40, 40, QtGui.QImage.Format_ARGB32)
-            image.fill(QtCore.Qt.transparent)
-            painter = QtGui.QPainter(image)
-            painter.setFont(font)
-            painter.setPen(QtGui.QPen(QtGui.QColor("#FDF34D"), 5))
-            painter.drawText(image.rect(), QtCore.Qt.AlignCenter, direction)
-            painter.end()
-            images[direction] = image
-        return images
-
-    def create_degree_images(self):
-        degrees = [30, 60, 120, 150, 210, 240, 300, 330]
-        images = {}
-        font = QtGui.QFont()
-        font.setPointSize(11)
-        font.setBold(True)
-        for degree in degrees:
-            image = QtGui.QImage(40, 40, QtGui.QImage.Format_ARGB32)
-            image.fill(QtCore.Qt.transparent)
-            painter = QtGui.QPainter(image)
-            painter.setFont(font)
-            painter.setPen(QtGui.QPen(QtGui.QColor("white"), 4))
-            painter.drawText(image.rect(), QtCore.Qt.AlignCenter, str(degree))
-            painter.end()
-            images[degree] = image
-        return images
-
-    def update_angle_label(self):
-        direction = self.get_direction(self.heading_angle)
-        self.angle_label.setText(f"{self.heading_angle:.1f}° {direction}")
-        self.angle_label.adjustSize()
-        self.angle_label.move(self.width() // 2 - self.angle_label.width() // 2, self.height() // 2 - self.angle_label.height() // 2)
-
-    def get_direction(self, angle):
-        if 337.5 <= angle < 360 or 0 <= angle < 22.5:
-            return "N"
-        elif 22.5 <= angle < 67.5:
-            return "NE"
-        elif 67.5 <= angle < 112.5:
-            return "E"
-        elif 112.5 <= angle < 157.5:
-            return "SE"
-        elif 157.5 <= angle < 202.5:
-            return "S"
-        elif 202.5 <= angle < 247.5:
-            return "SW"
-        elif 247.5 <= angle < 292.5:
-            return "W"
-        elif 292.5 <= angle < 337.5:
-            return "NW"
-
-    def paintEvent(self, event):
-        painter = QtGui.QPainter(self)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
-
-        # Create a clipping path with rounded corners
-        path = QtGui.QPainterPath()
-        path.addRoundedRect(QtCore.QRectF(self.rect()), 30, 30)
-        painter.setClipPath(path)
-
-        # Fill the background with dark gray color
-        painter.fillRect(self.rect(), QtGui.QColor("#151515"))
-
-        self.draw_compass(painter)
-
-    def draw_compass(self, painter):
-        width = self.width()
-        height = self.height()
-        center_x = width // 2
-        center_y = height // 2
-
-        # Draw the outer ellipse
-        painter.setPen(QtGui.QPen(QtGui.QColor("#555"), 5))
-        painter.drawEllipse(center_x - 156, center_y - 156, 312, 312)
-
-        # Draw the compass ellipse
-        painter.setBrush(QtCore.Qt.NoBrush)
-        painter.setPen(QtGui.QPen(QtGui.QColor("#555"), 5))
-        painter.drawEllipse(center_x - 140, center_y - 140, 280, 280)  
-
-        # Draw tick marks (increments)
-        tick_count = 36
-        for i in range(tick_count):  # 36 tick marks
-            angle = math.radians(i * (360 / tick_count))
-            x1 = int(center_x + 115 * math.sin(angle))  
-            y1 = int(center_y - 115 * math.cos(angle))  
-            x2 = int(center_x + 135 * math.sin(angle)) 
-            y2 = int(center_y - 135 * math.cos(angle))  
-            painter.setPen(QtGui.QPen(QtGui.QColor("#D9F054"), 4))  # Bolder tick marks
-            painter.drawLine(x1, y1, x2, y2)
-
-            # Draw dots between tick marks
-            next_angle = math.radians((i + 1) * (360 / tick_count))
-            dot_angle = (angle + next_angle) / 2  # Position dot between tick marks
-            dot_x = int(center_x + 115 * math.sin(dot_angle))  # Adjusts margin to the center
-            dot_y = int(center_y - 115 * math.cos(dot_angle))  # Adjusts margin to the center
-            painter.setPen(QtGui.QPen(QtGui.QColor("#D9F054"), 3))  # Dot color
-            painter.setBrush(QtGui.QBrush(QtGui.QColor("#D9F054")))  # Fill color for the dots
-            painter.drawEllipse(dot_x - 2, dot_y - 2, 4, 4)  # Draw small circles
-
-        # Draw compass needle as a triangle
-        painter.setBrush(QtGui.QColor("white"))
-        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 1))
-        needle_points = [
-            QtCore.QPoint(center_x, center_y - 75),
-            QtCore.QPoint(center_x - 10, center_y - 55),
-            QtCore.QPoint(center_x + 10, center_y - 55)
-        ]
-        painter.drawPolygon(QtGui.QPolygon(needle_points))
-
-        # Draw compass directions closer to the center
-        directions = ["N", "E", "S", "W"]
-        for i, direction in enumerate(directions):
-            angle = math.radians(i * 90 - self.heading_angle)  # Adjust angle based on heading
-            x = int(center_x + 95 * math.sin(angle))  # Position relative to the center
-            y = int(center_y - 95 * math.cos(angle))  # Position relative to the center
-            painter.save()
-            painter.translate(x, y)
-            painter.rotate(i * 90 - self.heading_angle)  # Rotate to point towards the center
-            painter.drawImage(-20, -20, self.direction_images[direction])  # Draw pre-rendered image
-            painter.restore()
-
-        # Draw additional degree labels
-        additional_degrees = [30, 60, 120, 150, 210, 240, 300, 330]
-        for degree in additional_degrees:
-            angle = math.radians(degree - self.heading_angle)  # Adjust angle based on heading
-            x = int(center_x + 100 * math.sin(angle))  # Position inside the compass
-            y = int(center_y - 100 * math.cos(angle))  # Position inside the compass
-            painter.save()
-            painter.translate(x, y)
-            painter.rotate(degree - self.heading_angle)  # Rotate to point towards the center
-            painter.drawImage(-14, -14, self.degree_images[degree])  # Draw pre-rendered image
-            painter.restore()
-
-        # Update heading angle for demonstration
-        self.heading_angle += 0.08 * self.rotation_direction  # Adjust the increment based on rotation direction
-        if self.heading_angle >= 360 or self.heading_angle <= 0:
-            self.rotation_direction *= -1  # Reverse the direction
-
-        self.update_angle_label()
-
-    def update_compass(self):
-        self.update()
-
-if __name__ == "__main__":
-    import sys
-    app = QtWidgets.QApplication(sys.argv)
-    window = CompassWidget()
-    window.show()
-    sys.exit(app.exec_())
+from PyQt5 import QtWidgets, QtGui, QtCore
+from dial_geometry import ring_points, tick_lines
+from dirty_region import DirtyRegions, disc_polygon
+from frame_clock import shared_clock
+from glyph_atlas import glyph_atlas
+from instrument_models import CompassModel
+from layer_cache import DESIGN_SIZE, Layer, LayerCache, paint_instrument, painter_scale
+from paint_resources import brush, color, font, pen, rounded_rect_path
+
+class CompassWidget(QtWidgets.QWidget):
+    PROFILED_METHODS = ("paintEvent", "draw_compass")  # Timed by the diagnostics overlay when enabled
+
+    def __init__(self, parent=None, compass_color="#FFFFFF", clock=None):
+        super().__init__(parent)
+        self.model = CompassModel()
+        self.clock = clock or shared_clock()
+        self.clock.subscribe(self, self.update_compass, 30)  # Update interval at 30 milliseconds
+        self.setMinimumSize(150, 150)
+        self.setContentsMargins(0, 0, 0, 0)
+
+        # Angle and direction readout, composed from cached glyphs
+        self.readout_glyphs = glyph_atlas(font(pixel_size=24), "white")
+
+        # Compass cards (ticks, dots and labels), rendered once per size and device pixel ratio
+        self.layers = LayerCache()
+        self.dirty = DirtyRegions(self)
+        self.frame = None  # Finished image from a render thread, blitted instead of painting (threaded_render)
+
+    def sizeHint(self):
+        return QtCore.QSize(DESIGN_SIZE, DESIGN_SIZE)
+
+    def create_direction_images(self, scale):
+        directions = ["N", "E", "S", "W"]
+        images = {}
+        for direction in directions:
+            image = Layer(40, 40, scale)
+            painter = image.begin()
+            painter.setFont(font(point_size=18, bold=True))
+            painter.setPen(pen("#FDF34D", 5))
+            painter.drawText(QtCore.QRectF(0, 0, 40, 40), QtCore.Qt.AlignCenter, direction)
+            painter.end()
+            images[direction] = image
+        return images
+
+    def create_degree_images(self, scale):
+        degrees = [30, 60, 120, 150, 210, 240, 300, 330]
+        images = {}
+        for degree in degrees:
+            image = Layer(40, 40, scale)
+            painter = image.begin()
+            painter.setFont(font(point_size=11, bold=True))
+            painter.setPen(pen("white", 4))
+            painter.drawText(QtCore.QRectF(0, 0, 40, 40), QtCore.Qt.AlignCenter, str(degree))
+            painter.end()
+            images[degree] = image
+        return images
+
+    def heading_text(self):
+        direction = self.get_direction(self.model.heading_angle % 360)
+        return f"{self.model.heading_angle:.1f}° {direction}"
+
+    def get_direction(self, angle):
+        if 337.5 <= angle < 360 or 0 <= angle < 22.5:
+            return "N"
+        elif 22.5 <= angle < 67.5:
+            return "NE"
+        elif 67.5 <= angle < 112.5:
+            return "E"
+        elif 112.5 <= angle < 157.5:
+            return "SE"
+        elif 157.5 <= angle < 202.5:
+            return "S"
+        elif 202.5 <= angle < 247.5:
+            return "SW"
+        elif 247.5 <= angle < 292.5:
+            return "W"
+        elif 292.5 <= angle < 337.5:
+            return "NW"
+
+    def paintEvent(self, event):
+        paint_instrument(self)
+
+    def paint(self, painter):
+        # Draws in design units; also used to paint fleet view tiles
+
+        # Create a clipping path with rounded corners
+        painter.setClipPath(rounded_rect_path(0, 0, DESIGN_SIZE, DESIGN_SIZE, 30))
+
+        # Fill the background with dark gray color
+        painter.fillRect(QtCore.QRectF(0, 0, DESIGN_SIZE, DESIGN_SIZE), color("#151515"))
+
+        self.draw_compass(painter)
+
+    def get_card_layer(self, scale):
+        return self.layers.get(scale, lambda: self.create_card_layer(scale))
+
+    def create_card_layer(self, scale):
+        # Direction and degree labels are pre-rendered at the card's scale so they stay sharp
+        direction_images = self.create_direction_images(scale)
+        degree_images = self.create_degree_images(scale)
+        layer = Layer(DESIGN_SIZE, DESIGN_SIZE, scale)
+        painter = layer.begin()
+        self.draw_card(painter, direction_images, degree_images)
+        painter.end()
+        return layer
+
+    def draw_card(self, painter, direction_images, degree_images):
+        # The card is drawn at heading 0 and rotated as a whole when painted
+        # Draw tick marks (increments)
+        tick_angles = tuple(i * 10 for i in range(36))  # 36 tick marks
+        painter.setPen(pen("#D9F054", 4))  # Bolder tick marks
+        painter.drawLines(tick_lines(tick_angles, 115, 135))
+
+        # Draw dots between tick marks as round points, the size of small filled circles
+        dot_angles = tuple(angle + 5 for angle in tick_angles)
+        painter.setPen(pen("#D9F054", 7, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap))  # Dot color
+        painter.drawPoints(ring_points(dot_angles, 115))
+
+        # Draw compass directions closer to the center
+        directions = ["N", "E", "S", "W"]
+        for i, anchor in enumerate(ring_points((0, 90, 180, 270), 95)):
+            painter.save()
+            painter.translate(anchor)
+            painter.rotate(i * 90)  # Rotate to point towards the center
+            direction_images[directions[i]].draw(painter, -20, -20)  # Draw pre-rendered image
+            painter.restore()
+
+        # Draw additional degree labels inside the compass
+        additional_degrees = (30, 60, 120, 150, 210, 240, 300, 330)
+        for degree, anchor in zip(additional_degrees, ring_points(additional_degrees, 100)):
+            painter.save()
+            painter.translate(anchor)
+            painter.rotate(degree)  # Rotate to point towards the center
+            degree_images[degree].draw(painter, -14, -14)  # Draw pre-rendered image
+            painter.restore()
+
+    def draw_compass(self, painter):
+        center_x = DESIGN_SIZE // 2
+        center_y = DESIGN_SIZE // 2
+
+        # Draw the outer ellipse
+        painter.setPen(pen("#555", 5))
+        painter.drawEllipse(center_x - 156, center_y - 156, 312, 312)
+
+        # Draw the compass ellipse
+        painter.setBrush(QtCore.Qt.NoBrush)
+        painter.setPen(pen("#555", 5))
+        painter.drawEllipse(center_x - 140, center_y - 140, 280, 280)  
+
+        # Draw the pre-rendered card with a single rotated blit
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.translate(center_x, center_y)
+        painter.rotate(-self.model.heading_angle)
+        self.get_card_layer(painter_scale(painter)).draw(painter, -center_x, -center_y)
+        painter.restore()
+
+        # Draw compass needle as a triangle
+        painter.setBrush(brush("white"))
+        painter.setPen(pen("white", 1))
+        needle_points = [
+            QtCore.QPoint(center_x, center_y - 75),
+            QtCore.QPoint(center_x - 10, center_y - 55),
+            QtCore.QPoint(center_x + 10, center_y - 55)
+        ]
+        painter.drawPolygon(QtGui.QPolygon(needle_points))
+
+        # Draw the angle and direction readout at the center
+        self.readout_glyphs.draw_text(painter, QtCore.QRectF(0, 0, DESIGN_SIZE, DESIGN_SIZE), self.heading_text())
+
+    def update_compass(self, now):
+        changed = self.model.advance(now)
+
+        # Only the rotating card and the readout inside it move; the bezel and the rounded corners stay as painted.
+        # While turning, the card waits until its rim has visibly moved or the readout changed; once stopped it is exact.
+        tolerance = self.dirty.angle_tolerance(138) if changed else 0
+        self.dirty.move("card", (self.model.heading_angle, self.heading_text()), lambda state, margin: [disc_polygon(180, 180, 138, margin)], tolerance)
+        return changed
+
+if __name__ == "__main__":
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    window = CompassWidget()
+    window.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,211 @@
+from PyQt5 import QtWidgets, QtGui, QtCore
+import collections
+import functools
+import math
+import os
+import time
+from frame_clock import shared_clock
+
+class TimingSeries:
+    def __init__(self, size=120):
+        self.samples = collections.deque(maxlen=size)  # (timestamp, value) pairs
+        self.count = 0  # Samples ever added
+
+    def add(self, now, value):
+        self.samples.append((now, value))
+        self.count += 1
+
+    def mean(self):
+        if not self.samples:
+            return 0
+        return sum(value for _, value in self.samples) / len(self.samples)
+
+    def deviation(self):
+        if len(self.samples) < 2:
+            return 0
+        mean = self.mean()
+        return math.sqrt(sum((value - mean) ** 2 for _, value in self.samples) / (len(self.samples) - 1))
+
+    def rate(self, now, window=1.0):
+        # Samples per second over the last window seconds
+        return sum(1 for timestamp, _ in self.samples if now - timestamp <= window) / window
+
+class Diagnostics:
+    def __init__(self, clock=None):
+        self.clock = clock or shared_clock()
+        self.enabled = False
+        self.installed = []  # (class, method name, original function) for every hooked method
+        self.paint_times = {}  # "Class.method" -> TimingSeries of durations in seconds
+        self.frame_intervals = TimingSeries()
+        self.last_tick = None
+        self.missed_ticks = 0
+        self.first_frames = {}  # Startup report: name -> seconds until its first frame
+        self.exported = False  # A MetricsExporter reads the timings, so they stay on while the overlay is hidden
+
+    def enable(self, classes):
+        # Hooks are only installed while enabled, so a disabled panel runs the plain methods
+        if self.enabled:
+            return
+        for cls in classes:
+            self.install(cls)
+        self.last_tick = None
+        self.clock.ticked.connect(self.on_tick)
+        self.clock.slept.connect(self.on_sleep)
+        self.enabled = True
+
+    def install(self, cls):
+        # Also used for instrument classes that are only imported after diagnostics were switched on
+        if any(installed is cls for installed, _, _ in self.installed):
+            return
+        for name in cls.PROFILED_METHODS:
+            original = cls.__dict__[name]
+            setattr(cls, name, self.timed(f"{cls.__name__}.{name}", original))
+            self.installed.append((cls, name, original))
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for cls, name, original in self.installed:
+            setattr(cls, name, original)
+        self.installed = []
+        self.clock.ticked.disconnect(self.on_tick)
+        self.clock.slept.disconnect(self.on_sleep)
+        self.enabled = False
+
+    def timed(self, key, method):
+        series = self.paint_times.setdefault(key, TimingSeries())
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                series.add(end, end - start)
+        return wrapper
+
+    def on_tick(self, now):
+        if self.last_tick is not None:
+            interval = now - self.last_tick
+            self.frame_intervals.add(now, interval)
+            # A tick that arrives after two or more nominal intervals stands in for the ones it swallowed
+            self.missed_ticks += max(0, round(interval * 1000 / self.clock.interval) - 1)
+        self.last_tick = now
+
+    def on_sleep(self):
+        # The first tick after the clock wakes up starts a new series instead of counting the idle gap
+        self.last_tick = None
+
+    def instrument_stats(self):
+        # paintEvent timings per instrument class, with the fps it is actually being painted at
+        now = time.perf_counter()
+        stats = {}
+        for key, series in self.paint_times.items():
+            instrument, _, method = key.partition(".")
+            if method == "paintEvent":
+                stats[instrument] = (series.mean(), series.rate(now))
+        return stats
+
+    def summary_lines(self):
+        lines = []
+        for instrument, (paint_time, fps) in sorted(self.instrument_stats().items()):
+            lines.append(f"{instrument:30} {paint_time * 1000:6.2f} ms {fps:5.1f} fps")
+        lines.append(f"{'Frame interval':30} {self.frame_intervals.mean() * 1000:6.2f} ms")
+        lines.append(f"{'Frame jitter':30} {self.frame_intervals.deviation() * 1000:6.2f} ms")
+        lines.append(f"{'Missed ticks':30} {self.missed_ticks:6d}")
+        for name, seconds in self.first_frames.items():
+            lines.append(f"{'First frame ' + name:30} {seconds * 1000:6.0f} ms")
+        return lines
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP flight_instruments_paint_seconds Mean time spent in an instrument paint method over recent frames.",
+            "# TYPE flight_instruments_paint_seconds gauge",
+        ]
+        for key, series in sorted(self.paint_times.items()):
+            instrument, _, method = key.partition(".")
+            lines.append(f'flight_instruments_paint_seconds{{instrument="{instrument}",method="{method}"}} {series.mean():.6f}')
+        lines += [
+            "# HELP flight_instruments_fps Frames per second each instrument is painted at.",
+            "# TYPE flight_instruments_fps gauge",
+        ]
+        for instrument, (_, fps) in sorted(self.instrument_stats().items()):
+            lines.append(f'flight_instruments_fps{{instrument="{instrument}"}} {fps:.1f}')
+        lines += [
+            "# HELP flight_instruments_frame_interval_seconds Mean interval between frame clock ticks.",
+            "# TYPE flight_instruments_frame_interval_seconds gauge",
+            f"flight_instruments_frame_interval_seconds {self.frame_intervals.mean():.6f}",
+            "# HELP flight_instruments_frame_jitter_seconds Standard deviation of the frame clock interval.",
+            "# TYPE flight_instruments_frame_jitter_seconds gauge",
+            f"flight_instruments_frame_jitter_seconds {self.frame_intervals.deviation():.6f}",
+            "# HELP flight_instruments_missed_ticks_total Frame clock ticks that arrived too late to run.",
+            "# TYPE flight_instruments_missed_ticks_total counter",
+            f"flight_instruments_missed_ticks_total {self.missed_ticks}",
+            "# HELP flight_instruments_first_frame_seconds Time from process start until the window or an instrument was first painted.",
+            "# TYPE flight_instruments_first_frame_seconds gauge",
+        ]
+        for name, seconds in self.first_frames.items():
+            lines.append(f'flight_instruments_first_frame_seconds{{widget="{name}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter(QtCore.QObject):
+    def __init__(self, diagnostics, path, interval=5000, parent=None):
+        super().__init__(parent)
+        self.diagnostics = diagnostics
+        self.diagnostics.exported = True
+        self.path = path
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.export)
+        self.timer.start(interval)
+
+    def export(self):
+        # Write to a temporary file and rename it so scrapers never see half a file
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            file.write(self.diagnostics.prometheus_text())
+        os.replace(temporary_path, self.path)
+
+class DiagnosticsOverlay(QtWidgets.QWidget):
+    def __init__(self, diagnostics, classes, parent=None):
+        super().__init__(parent)
+        self.diagnostics = diagnostics
+        self.classes = classes
+        self.lines = []
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setFont(QtGui.QFont("Courier", 10))
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+            if not self.diagnostics.exported:
+                self.diagnostics.disable()  # Back to the plain paint methods
+        else:
+            self.diagnostics.enable(self.classes)
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start(500)
+
+    def refresh(self):
+        self.lines = self.diagnostics.summary_lines()
+        metrics = QtGui.QFontMetrics(self.font())
+        width = max(metrics.horizontalAdvance(line) for line in self.lines) + 20
+        height = metrics.lineSpacing() * len(self.lines) + 20
+        parent = self.parentWidget()
+        self.setGeometry(parent.width() - width - 10, parent.height() - height - 10, width, height)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtGui.QColor(0, 0, 0, 200))
+        painter.setPen(QtGui.QColor("#7CFC00"))
+        metrics = painter.fontMetrics()
+        y = 10 + metrics.ascent()
+        for line in self.lines:
+            painter.drawText(10, y, line)
+            y += metrics.lineSpacing()
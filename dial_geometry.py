@@ -0,0 +1,41 @@
+from PyQt5 import QtGui, QtCore
+import functools
+import math
+from layer_cache import DESIGN_SIZE
+
+# Dial angles are in degrees clockwise from 12 o'clock around the instrument center, in design units.
+# Results are cached per argument set and shared between callers, so they must not be modified.
+CENTER = DESIGN_SIZE // 2
+
+@functools.lru_cache(maxsize=None)
+def ring_points(angles, radius, center_x=CENTER, center_y=CENTER):
+    # Points on a circle at each angle, e.g. label anchors or dots; drawPoints takes the polygon as is
+    return QtGui.QPolygonF([
+        QtCore.QPointF(center_x + radius * math.sin(math.radians(angle)), center_y - radius * math.cos(math.radians(angle)))
+        for angle in angles
+    ])
+
+@functools.lru_cache(maxsize=None)
+def tick_lines(angles, inner, outer, center_x=CENTER, center_y=CENTER):
+    # Radial tick marks from inner to outer radius, drawn with one drawLines call per pen
+    inner_points = ring_points(angles, inner, center_x, center_y)
+    outer_points = ring_points(angles, outer, center_x, center_y)
+    return [QtCore.QLineF(inner_points[i], outer_points[i]) for i in range(len(angles))]
+
+@functools.lru_cache(maxsize=None)
+def radial_box_lines(angles, inner, outer, width, center_x=CENTER, center_y=CENTER):
+    # Outlines of width-wide boxes running from inner to outer radius, four lines per box
+    lines = []
+    for angle in angles:
+        transform = QtGui.QTransform().translate(center_x, center_y).rotate(angle)
+        box = transform.map(QtGui.QPolygonF(QtCore.QRectF(-width / 2, -outer, width, outer - inner)))
+        lines += [QtCore.QLineF(box[i], box[(i + 1) % 4]) for i in range(4)]
+    return lines
+
+@functools.lru_cache(maxsize=None)
+def needle_shape(points):
+    return QtGui.QPolygonF([QtCore.QPointF(x, y) for x, y in points])
+
+def needle_polygon(points, angle, center_x=CENTER, center_y=CENTER):
+    # Shape given as (x, y) points for a needle pointing at 12 o'clock, turned to angle in one mapping
+    return QtGui.QTransform().translate(center_x, center_y).rotate(angle).map(needle_shape(points))
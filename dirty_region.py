@@ -0,0 +1,86 @@
+from PyQt5 import QtGui, QtCore
+import math
+from layer_cache import instrument_transform
+
+# Widget pixels added around every moving part to cover antialiased edges
+EDGE_PIXELS = 1.5
+
+# Device pixels a moving part may drift from where it was painted before it is repainted
+IDLE_PIXELS = 0.5
+
+def needle_bounds(center_x, center_y, angle, length, half_width, margin, tail=0):
+    # Rotated rectangle covering a needle drawn from the center along angle (radians, 0 at 3 o'clock)
+    dx, dy = math.cos(angle), math.sin(angle)
+    px, py = -dy, dx
+    width = half_width + margin
+    start = -(tail + margin)
+    end = length + margin
+    return QtGui.QPolygonF([
+        QtCore.QPointF(center_x + dx * start + px * width, center_y + dy * start + py * width),
+        QtCore.QPointF(center_x + dx * end + px * width, center_y + dy * end + py * width),
+        QtCore.QPointF(center_x + dx * end - px * width, center_y + dy * end - py * width),
+        QtCore.QPointF(center_x + dx * start - px * width, center_y + dy * start - py * width),
+    ])
+
+def disc_polygon(center_x, center_y, radius, margin, sides=32):
+    # Polygon drawn around a circle so the circle lies entirely inside it
+    outer = (radius + margin) / math.cos(math.pi / sides)
+    return QtGui.QPolygonF([
+        QtCore.QPointF(center_x + outer * math.cos(2 * math.pi * i / sides), center_y + outer * math.sin(2 * math.pi * i / sides))
+        for i in range(sides)
+    ])
+
+def rect_polygon(rect, margin):
+    return QtGui.QPolygonF(QtCore.QRectF(rect).adjusted(-margin, -margin, margin, margin))
+
+def within_tolerance(previous, state, tolerance):
+    # Numbers match within tolerance, tuples per element (with a tolerance each or one for all), anything else exactly
+    if isinstance(state, tuple):
+        tolerances = tolerance if isinstance(tolerance, tuple) else (tolerance,) * len(state)
+        return len(previous) == len(state) and all(map(within_tolerance, previous, state, tolerances))
+    if isinstance(state, (int, float)) and isinstance(previous, (int, float)):
+        return abs(state - previous) <= tolerance
+    return previous == state
+
+class DirtyRegions:
+    # Repaints only where an instrument's moving parts were drawn and where they are drawn now
+    def __init__(self, widget):
+        self.widget = widget
+        self.parts = {}  # Part name -> (state it was drawn in, widget region it covers)
+        self.size = None
+
+    def pixel_size(self):
+        # Design units covered by one device pixel at the widget's current size
+        scale = instrument_transform(self.widget).m11() * self.widget.devicePixelRatioF()
+        return 1 / max(scale, 1e-6)
+
+    def angle_tolerance(self, radius):
+        # Degrees a part reaching out to radius may turn before its tip has moved IDLE_PIXELS
+        return math.degrees(IDLE_PIXELS * self.pixel_size() / radius)
+
+    def move(self, name, state, shapes, tolerance=0):
+        # shapes(state, margin) returns design-unit polygons covering the part, grown by margin.
+        # A state within tolerance of the painted one is not repainted, so sub-pixel motion costs nothing.
+        if self.size != self.widget.size():
+            # A resize repaints the whole widget, and regions from the old geometry no longer apply
+            self.parts.clear()
+            self.size = self.widget.size()
+
+        previous = self.parts.get(name)
+        if previous is not None and within_tolerance(previous[0], state, tolerance):
+            return
+
+        transform = instrument_transform(self.widget)
+        margin = EDGE_PIXELS / max(transform.m11(), 1e-6)
+        region = QtGui.QRegion()
+        for polygon in shapes(state, margin):
+            region = region.united(QtGui.QRegion(transform.map(polygon).toPolygon()))
+        self.parts[name] = (state, region)
+
+        if self.widget.frame is not None:
+            return  # Rendered on a thread: the finished frame repaints the widget (threaded_render)
+        if previous is None:
+            # Where the part was painted before tracking started is unknown
+            self.widget.update()
+        else:
+            self.widget.update(region.united(previous[1]))
@@ -0,0 +1,179 @@
+from PyQt5 import QtWidgets, QtGui, QtCore
+import math
+import random
+from artificial_horizon import ArtificialHorizon
+from compass_widget import CompassWidget
+from altimeter_widget import AltimeterWidget
+from vsi_widget import VerticalSpeedIndicatorWidget
+from frame_clock import shared_clock
+from instrument_models import HorizonModel, CompassModel, AltimeterModel, VerticalSpeedModel
+from layer_cache import DESIGN_SIZE
+from paint_resources import color, font, pen
+
+class Aircraft:
+    ROTATION_INTERVAL = 10  # Seconds between demo bank cycles, as in ArtificialHorizon
+
+    def __init__(self, name, source=None, rotation_phase=0):
+        self.name = name
+        self.models = [HorizonModel(), CompassModel(), AltimeterModel(), VerticalSpeedModel()]
+        for model in self.models:
+            model.source = source
+        self.rotation_phase = rotation_phase
+        self.next_rotation = None
+        self.painted = [None] * len(self.models)  # State each instrument tile was last repainted for
+
+    def advance(self, now):
+        if self.next_rotation is None:
+            self.next_rotation = now + self.rotation_phase
+        elif now >= self.next_rotation:
+            self.models[0].start_rotation()
+            self.next_rotation = now + self.ROTATION_INTERVAL
+        changed = False
+        for model in self.models:
+            changed = model.advance(now) or changed
+        return changed
+
+    def states(self):
+        # What each instrument shows; a tile is only repainted when its entry changes
+        return [model.state() for model in self.models]
+
+def demo_aircraft(count):
+    # Demo aircraft started from different attitudes, headings and altitudes so the grid is not uniform
+    fleet = []
+    for index in range(count):
+        generator = random.Random(index)
+        aircraft = Aircraft(f"Aircraft {index + 1:03d}", rotation_phase=generator.uniform(0, Aircraft.ROTATION_INTERVAL))
+        horizon, compass, altimeter, vsi = aircraft.models
+        horizon.pitch_angle = generator.uniform(-30, 30)
+        compass.heading_angle = generator.uniform(0, 360)
+        altimeter.altitude = generator.uniform(0, 40000)
+        vsi.vertical_speed = generator.uniform(-5, 5)
+        fleet.append(aircraft)
+    return fleet
+
+class FleetCanvas(QtWidgets.QAbstractScrollArea):
+    PROFILED_METHODS = ("paintEvent",)  # Timed by the diagnostics overlay when enabled
+    RENDERER_CLASSES = (ArtificialHorizon, CompassWidget, AltimeterWidget, VerticalSpeedIndicatorWidget)
+    MARGIN = 20  # Around the grid
+    TILE_SPACING = 20  # Between aircraft
+    INSTRUMENT_SPACING = 8  # Between the instruments of one aircraft
+    LABEL_HEIGHT = 24
+
+    def __init__(self, aircraft, instrument_size=160, parent=None):
+        super().__init__(parent)
+        self.aircraft = list(aircraft)
+        self.instrument_size = instrument_size
+        self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.viewport().setAttribute(QtCore.Qt.WA_OpaquePaintEvent)
+        self.label_font = font("Arial", pixel_size=16)
+
+        # One hidden instance of each instrument paints every tile with that aircraft's model swapped in,
+        # so the grid costs one widget however many aircraft it holds
+        self.renderers = []
+        for cls in self.RENDERER_CLASSES:
+            renderer = cls(self)
+            renderer.hide()
+            renderer.resize(instrument_size, instrument_size)  # Layer caches are built at the tile size
+            self.renderers.append(renderer)
+
+        self.clock = shared_clock()
+        self.clock.subscribe(self, self.update_fleet, 30)  # Update interval at 30 milliseconds
+        self.update_scroll_range()
+
+    def tile_size(self):
+        side = self.instrument_size
+        count = len(self.RENDERER_CLASSES)
+        return QtCore.QSize(count * side + (count - 1) * self.INSTRUMENT_SPACING, self.LABEL_HEIGHT + side)
+
+    def columns(self):
+        available = self.viewport().width() - 2 * self.MARGIN + self.TILE_SPACING
+        return max(1, available // (self.tile_size().width() + self.TILE_SPACING))
+
+    def tile_rect(self, index):
+        # Tile of the aircraft at index in viewport coordinates
+        tile = self.tile_size()
+        row, column = divmod(index, self.columns())
+        x = self.MARGIN + column * (tile.width() + self.TILE_SPACING)
+        y = self.MARGIN + row * (tile.height() + self.TILE_SPACING) - self.verticalScrollBar().value()
+        return QtCore.QRect(x, y, tile.width(), tile.height())
+
+    def instrument_rect(self, index, instrument):
+        tile = self.tile_rect(index)
+        x = tile.x() + instrument * (self.instrument_size + self.INSTRUMENT_SPACING)
+        return QtCore.QRect(x, tile.y() + self.LABEL_HEIGHT, self.instrument_size, self.instrument_size)
+
+    def visible_indices(self):
+        # Only rows that intersect the viewport are advanced and painted
+        pitch = self.tile_size().height() + self.TILE_SPACING
+        top = self.verticalScrollBar().value() - self.MARGIN
+        first_row = max(0, top // pitch)
+        last_row = (top + self.viewport().height()) // pitch
+        columns = self.columns()
+        return range(min(len(self.aircraft), first_row * columns), min(len(self.aircraft), (last_row + 1) * columns))
+
+    def update_scroll_range(self):
+        rows = math.ceil(len(self.aircraft) / self.columns())
+        content_height = 2 * self.MARGIN + rows * self.tile_size().height() + max(0, rows - 1) * self.TILE_SPACING
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setRange(0, max(0, content_height - self.viewport().height()))
+        scroll_bar.setPageStep(self.viewport().height())
+        scroll_bar.setSingleStep(self.tile_size().height() // 4)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+        self.clock.wake()  # Aircraft coming into view have not been advanced while it slept
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+        self.clock.wake()
+
+    def update_fleet(self, now):
+        # Aircraft scrolled out of view are paused, like instruments in a hidden window
+        changed = False
+        for index in self.visible_indices():
+            aircraft = self.aircraft[index]
+            changed = aircraft.advance(now) or changed
+            for instrument, state in enumerate(aircraft.states()):
+                if state != aircraft.painted[instrument]:
+                    aircraft.painted[instrument] = state
+                    self.viewport().update(self.instrument_rect(index, instrument))
+        return changed
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self.viewport())
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.fillRect(event.rect(), color("black"))
+        region = event.region()
+        scale = self.instrument_size / DESIGN_SIZE
+
+        for index in self.visible_indices():
+            tile = self.tile_rect(index)
+            if not region.intersects(tile):
+                continue
+            aircraft = self.aircraft[index]
+
+            label_rect = QtCore.QRect(tile.x() + 10, tile.y(), tile.width() - 10, self.LABEL_HEIGHT)
+            if region.intersects(label_rect):
+                painter.setFont(self.label_font)
+                painter.setPen(pen("#888"))
+                painter.drawText(label_rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter, aircraft.name)
+
+            for instrument, (renderer, model) in enumerate(zip(self.renderers, aircraft.models)):
+                rect = self.instrument_rect(index, instrument)
+                if not region.intersects(rect):
+                    continue
+                renderer.model = model
+                painter.save()
+                painter.translate(rect.topLeft())
+                painter.scale(scale, scale)
+                renderer.paint(painter)
+                painter.restore()
+
+if __name__ == "__main__":
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    canvas = FleetCanvas(demo_aircraft(300))
+    canvas.resize(1500, 900)
+    canvas.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,151 @@
+import bisect
+import mmap
+import os
+import struct
+import time
+from array import array
+from telemetry import PACKET, TelemetrySample
+
+# File layout: an 8 byte header (magic, record size) followed by fixed-size records in
+# telemetry packet format, in increasing timestamp order
+HEADER = struct.Struct("<4sI")
+MAGIC = b"FDR1"
+INDEX_STRIDE = 4096  # One sparse index entry every this many records
+
+class FlightRecorder:
+    def __init__(self, path):
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "ab")
+        if not exists:
+            self.file.write(HEADER.pack(MAGIC, PACKET.size))
+
+    def record(self, sample):
+        self.file.write(PACKET.pack(*sample))
+
+    def close(self):
+        self.file.close()
+
+class FlightLog:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, record_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or record_size != PACKET.size:
+            raise ValueError(f"{path} is not a flight data recording")
+        self.count = (len(self.map) - HEADER.size) // PACKET.size
+        if self.count == 0:
+            raise ValueError(f"{path} has no records")
+
+        # Sparse index: the timestamp of every INDEX_STRIDE-th record, so only those pages are touched
+        self.index = array("d", (self.timestamp(i) for i in range(0, self.count, INDEX_STRIDE)))
+        self.start_time = self.timestamp(0)
+        self.end_time = self.timestamp(self.count - 1)
+
+    def __len__(self):
+        return self.count
+
+    def timestamp(self, i):
+        return struct.unpack_from("<d", self.map, HEADER.size + i * PACKET.size)[0]
+
+    def sample(self, i):
+        return TelemetrySample(*PACKET.unpack_from(self.map, HEADER.size + i * PACKET.size))
+
+    def find(self, timestamp):
+        # Index of the last record at or before timestamp, in O(log n)
+        block = max(0, bisect.bisect_right(self.index, timestamp) - 1)
+        low = block * INDEX_STRIDE
+        high = min(low + INDEX_STRIDE, self.count)
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamp(middle) <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return max(0, low - 1)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+class ReplaySource:
+    def __init__(self, log, speed=1.0, clock=time.monotonic):
+        self.log = log
+        self.speed = speed
+        self.clock = clock
+        self.playing = True
+        self.position = log.start_time  # Log time at anchor_time
+        self.anchor_time = clock()
+        self.cursor = 0  # Last record returned, so normal playback only scans forward
+
+    def current_time(self, now=None):
+        if not self.playing:
+            return self.position
+        if now is None:
+            now = self.clock()
+        return min(self.position + (now - self.anchor_time) * self.speed, self.log.end_time)
+
+    def reanchor(self):
+        now = self.clock()
+        self.position = self.current_time(now)
+        self.anchor_time = now
+
+    def play(self):
+        if not self.playing:
+            self.anchor_time = self.clock()
+            self.playing = True
+
+    def pause(self):
+        if self.playing:
+            self.reanchor()
+            self.playing = False
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def set_speed(self, speed):
+        self.reanchor()
+        self.speed = speed
+
+    def seek(self, timestamp):
+        self.position = max(self.log.start_time, min(timestamp, self.log.end_time))
+        self.anchor_time = self.clock()
+
+    def sample_at(self, now):
+        position = self.current_time(now)
+
+        # During playback the next record is almost always within a few steps of the last one
+        cursor = self.cursor
+        for _ in range(8):
+            if cursor + 1 < len(self.log) and self.log.timestamp(cursor + 1) <= position:
+                cursor += 1
+            else:
+                break
+        else:
+            cursor = self.log.find(position)
+        if self.log.timestamp(cursor) > position:
+            cursor = self.log.find(position)
+        self.cursor = cursor
+        return self.log.sample(cursor)
+
+if __name__ == "__main__":
+    import argparse
+    from telemetry import TelemetryReceiver
+    parser = argparse.ArgumentParser(description="Record a telemetry feed to a flight data file")
+    parser.add_argument("address", help="udp:HOST:PORT or unix:PATH")
+    parser.add_argument("path", help="Recording to append to")
+    args = parser.parse_args()
+    recorder = FlightRecorder(args.path)
+    receiver = TelemetryReceiver(args.address)
+    receiver.recorder = recorder
+    receiver.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.stop()
+        recorder.close()
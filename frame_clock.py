@@ -0,0 +1,132 @@
+from PyQt5 import QtCore
+import functools
+import time
+import weakref
+
+class Subscription:
+    def __init__(self, widget, callback, interval, now, scheduled=False):
+        self.widget = weakref.ref(widget)
+        self.widget_id = id(widget)
+        self.callback = weakref.WeakMethod(callback)  # Bound method, must not keep the widget alive
+        self.interval = interval
+        self.last_time = now
+        self.scheduled = scheduled  # Runs when due even while the clock sleeps, so it never has to keep it awake
+        self.busy = not scheduled  # What the callback last returned; the clock sleeps once no subscription is busy
+
+class ManualTime:
+    # Time source that only moves when set, so a clock driven by it ticks at chosen timestamps
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class FrameClock(QtCore.QObject):
+    # Emitted at the start of every tick with the frame timestamp; diagnostics listen to it
+    ticked = QtCore.pyqtSignal(float)
+    wake_requested = QtCore.pyqtSignal()  # Queued to the clock's thread when wake() is called from another
+    slept = QtCore.pyqtSignal()  # The timer stopped, so the next tick comes after an idle gap of any length
+
+    def __init__(self, interval=30, parent=None, time_source=time.monotonic):
+        super().__init__(parent)
+        self.interval = interval  # Base tick in milliseconds
+        self.time_source = time_source  # Seconds as a float; a ManualTime makes every tick reproducible
+        self.frame_time = time_source()  # Timestamp shared by every instrument for the current tick
+        self.subscriptions = []
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+        self.wake_requested.connect(self.start)
+        self.sleeping = False
+
+        # Wakes a sleeping clock when its next scheduled subscription is due
+        self.alarm = QtCore.QTimer(self)
+        self.alarm.setSingleShot(True)
+        self.alarm.setTimerType(QtCore.Qt.PreciseTimer)
+        self.alarm.timeout.connect(self.start)
+
+    def subscribe(self, widget, callback, interval=None, scheduled=False):
+        # Call callback(now) every interval milliseconds while the widget is showing. The callback returns
+        # True while it has more to show; when every subscription returns a false value the clock sleeps.
+        # A scheduled subscription is a timed event (the horizon's rotation cycle) rather than a poll for
+        # changes, so the clock wakes up for it.
+        self.subscriptions.append(Subscription(widget, callback, interval or self.interval, self.time_source(), scheduled))
+        widget.destroyed.connect(functools.partial(self.drop_widget, id(widget)))
+        self.start()
+
+    def start(self):
+        self.sleeping = False
+        self.alarm.stop()
+        if not self.timer.isActive():
+            self.timer.start(self.interval)
+
+    def wake(self):
+        # Restart a sleeping clock because new data arrived; safe to call from any thread and cheap while awake
+        if self.sleeping:
+            self.sleeping = False
+            self.wake_requested.emit()
+
+    def unsubscribe(self, widget, callback):
+        self.subscriptions = [
+            subscription for subscription in self.subscriptions
+            if not (subscription.widget() is widget and subscription.callback() == callback)
+        ]
+
+    def drop_widget(self, widget_id):
+        self.subscriptions = [subscription for subscription in self.subscriptions if subscription.widget_id != widget_id]
+
+    def is_showing(self, widget):
+        # Hidden widgets and widgets in minimized windows are paused
+        return widget.isVisible() and not widget.window().isMinimized()
+
+    def tick(self):
+        now = self.time_source()
+        self.frame_time = now
+        self.ticked.emit(now)
+
+        # Half a base tick of slack keeps slower subscriptions aligned to the shared ticks
+        slack = self.interval / 2000
+        for subscription in list(self.subscriptions):
+            widget = subscription.widget()
+            callback = subscription.callback()
+            if widget is None or callback is None:
+                continue
+            if not self.is_showing(widget):
+                continue
+            if now - subscription.last_time < subscription.interval / 1000 - slack:
+                continue
+            subscription.last_time = now
+            subscription.busy = bool(callback(now))
+
+        # Instruments only call update() above, so Qt repaints all of them in one pass
+        self.subscriptions = [
+            subscription for subscription in self.subscriptions
+            if subscription.widget() is not None and subscription.callback() is not None
+        ]
+        if not self.subscriptions:
+            self.timer.stop()
+            self.slept.emit()
+        elif not any(subscription.busy for subscription in self.subscriptions):
+            # Nothing moved, so no instrument needs another tick until wake(), a new subscription or the
+            # next scheduled one
+            self.timer.stop()
+            self.sleeping = True
+            self.slept.emit()
+            self.set_alarm(now)
+
+    def set_alarm(self, now):
+        due = [
+            subscription.last_time + subscription.interval / 1000 for subscription in self.subscriptions
+            if subscription.scheduled and self.is_showing(subscription.widget())
+        ]
+        if due:
+            # Started early enough that the first tick after waking finds the subscription due
+            self.alarm.start(max(0, round((min(due) - now) * 1000) - self.interval))
+
+shared_frame_clock = None
+
+def shared_clock():
+    global shared_frame_clock
+    if shared_frame_clock is None:
+        shared_frame_clock = FrameClock()
+    return shared_frame_clock
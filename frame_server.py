@@ -0,0 +1,338 @@
+from PyQt5 import QtGui, QtCore
+import base64
+import collections
+import concurrent.futures
+import hashlib
+import os
+import socket
+import struct
+import threading
+import zlib
+
+# Binary messages, little-endian. A frame: FRAME_HEADER (frame id, id of the frame it is a delta
+# against or 0 for a full frame, panel width and height, tile count), then per tile TILE_HEADER
+# (left, top, PNG length) and the PNG. The viewer answers every frame with ACK, its frame id.
+FRAME_HEADER = struct.Struct("<IIHHH")
+TILE_HEADER = struct.Struct("<HHI")
+ACK = struct.Struct("<I")
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OPCODE_TEXT, OPCODE_BINARY, OPCODE_CLOSE, OPCODE_PING, OPCODE_PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+
+class ConnectionClosed(Exception):
+    pass
+
+def receive_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionClosed()
+        data += chunk
+    return bytes(data)
+
+def send_message(sock, opcode, payload, mask=False):
+    # One unfragmented WebSocket frame; clients must mask what they send, servers must not
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if len(payload) < 126:
+        header.append(mask_bit | len(payload))
+    elif len(payload) < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack(">H", len(payload))
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack(">Q", len(payload))
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(byte ^ key[i % 4] for i, byte in enumerate(payload))
+    sock.sendall(bytes(header) + payload)
+
+def receive_message(sock):
+    # Next data message as (opcode, payload), answering pings on the way
+    while True:
+        first, second = receive_exactly(sock, 2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack(">H", receive_exactly(sock, 2))
+        elif length == 127:
+            length, = struct.unpack(">Q", receive_exactly(sock, 8))
+        key = receive_exactly(sock, 4) if second & 0x80 else None
+        payload = receive_exactly(sock, length)
+        if key is not None:
+            payload = bytes(byte ^ key[i % 4] for i, byte in enumerate(payload))
+        opcode = first & 0x0F
+        if opcode == OPCODE_CLOSE:
+            raise ConnectionClosed()
+        if opcode == OPCODE_PING:
+            send_message(sock, OPCODE_PONG, payload)
+        elif opcode in (OPCODE_TEXT, OPCODE_BINARY):
+            return opcode, payload
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+
+def read_http_head(sock):
+    head = b""
+    while b"\r\n\r\n" not in head:
+        chunk = sock.recv(1024)
+        if not chunk or len(head) > 16384:
+            raise ConnectionClosed()
+        head += chunk
+    lines = head.split(b"\r\n\r\n")[0].decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+# Frame as published by the GUI thread: the image and a digest per tile, in row-major tile order
+Frame = collections.namedtuple("Frame", "frame_id image tiles digests")
+
+def tile_rects(width, height, tile_size):
+    return [
+        QtCore.QRect(x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+
+def tile_digests(image, tiles):
+    # Two 32-bit checksums per tile are plenty to notice a change and much cheaper than a cryptographic hash
+    digests = []
+    for rect in tiles:
+        tile = image.copy(rect)
+        data = tile.constBits().asstring(tile.sizeInBytes())
+        digests.append((zlib.crc32(data), zlib.adler32(data)))
+    return digests
+
+def encode_tile(image, rect):
+    # Runs on the worker pool; every call reads the shared frame and writes its own PNG
+    buffer = QtCore.QBuffer()
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    image.copy(rect).save(buffer, "PNG")
+    return bytes(buffer.data())
+
+class FrameStore:
+    HISTORY = 240  # Frames whose tile digests are kept; a viewer acknowledging an older one gets a full frame
+
+    def __init__(self, tile_size=64, workers=None):
+        self.tile_size = tile_size
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count(), thread_name_prefix="tile-encoder")
+        self.condition = threading.Condition()
+        self.history = collections.OrderedDict()  # Frame id -> tile digests
+        self.latest = None
+        self.encoded = {}  # Tile index -> Future of its PNG, for the latest frame only
+        self.next_id = 1
+        self.closed = False
+
+    def publish(self, image):
+        # GUI thread; a frame identical to the latest one is not published at all
+        tiles = self.latest.tiles if self.latest is not None and self.latest.image.size() == image.size() else \
+            tile_rects(image.width(), image.height(), self.tile_size)
+        digests = tile_digests(image, tiles)
+        if self.latest is not None and digests == self.latest.digests:
+            return
+        with self.condition:
+            frame = Frame(self.next_id, image, tiles, digests)
+            self.next_id += 1
+            self.history[frame.frame_id] = digests
+            while len(self.history) > self.HISTORY:
+                self.history.popitem(last=False)
+            self.latest = frame
+            self.encoded = {}
+            self.condition.notify_all()
+
+    def wait_newer(self, frame_id, timeout=None):
+        # Latest frame once it is newer than frame_id; frames published in between are skipped
+        with self.condition:
+            self.condition.wait_for(lambda: self.closed or (self.latest is not None and self.latest.frame_id > frame_id), timeout)
+            if self.closed or self.latest is None or self.latest.frame_id <= frame_id:
+                return None
+            return self.latest
+
+    def changed_tiles(self, base_id, frame):
+        # Tiles of frame that differ from frame base_id, or all of them if that frame is unknown
+        with self.condition:
+            base = self.history.get(base_id)
+        if base is None or len(base) != len(frame.digests):
+            return list(range(len(frame.tiles)))
+        return [index for index, (old, new) in enumerate(zip(base, frame.digests)) if old != new]
+
+    def encode(self, frame, indices):
+        # PNGs of the given tiles; each tile of the latest frame is encoded once for all viewers
+        with self.condition:
+            if frame is self.latest:
+                futures = []
+                for index in indices:
+                    if index not in self.encoded:
+                        self.encoded[index] = self.pool.submit(encode_tile, frame.image, frame.tiles[index])
+                    futures.append(self.encoded[index])
+            else:
+                futures = [self.pool.submit(encode_tile, frame.image, frame.tiles[index]) for index in indices]
+        return [future.result() for future in futures]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.pool.shutdown(wait=False)
+
+class Viewer:
+    def __init__(self, address):
+        self.address = address
+        self.frames_sent = 0
+        self.frames_dropped = 0  # Published while the viewer was still busy with an earlier frame
+        self.bytes_sent = 0
+
+class FrameServer(QtCore.QObject):
+    # Renders the window offscreen at fps while anyone is watching and streams tile deltas over WebSocket.
+    # Each viewer has at most one frame in flight; frames published meanwhile are dropped, not queued.
+    def __init__(self, window, host="127.0.0.1", port=8765, fps=30, tile_size=64, workers=None, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.store = FrameStore(tile_size, workers)
+        self.viewers = []
+        self.lock = threading.Lock()
+        self.sock = socket.create_server((host, port))
+        self.address = self.sock.getsockname()
+        self.running = True
+        self.thread = threading.Thread(target=self.accept_viewers, name="frame-server", daemon=True)
+        self.thread.start()
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.capture)
+        self.timer.start(round(1000 / fps))
+
+    def stop(self):
+        self.running = False
+        self.timer.stop()
+        self.store.close()
+        self.sock.close()
+
+    def capture(self):
+        if not self.viewers:
+            return  # Nobody is watching, so nothing is rendered
+        image = QtGui.QImage(self.window.size(), QtGui.QImage.Format_RGB32)
+        self.window.render(image)
+        self.store.publish(image)
+
+    def accept_viewers(self):
+        while self.running:
+            try:
+                connection, address = self.sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self.serve_viewer, args=(connection, address), name="frame-viewer", daemon=True).start()
+
+    def serve_viewer(self, connection, address):
+        viewer = Viewer(address)
+        try:
+            request, headers = read_http_head(connection)
+            if "sec-websocket-key" not in headers:
+                connection.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                return
+            connection.sendall(
+                b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                + f"Sec-WebSocket-Accept: {accept_key(headers['sec-websocket-key'])}\r\n\r\n".encode())
+            with self.lock:
+                self.viewers.append(viewer)
+            self.stream(connection, viewer)
+        except (ConnectionClosed, OSError):
+            pass
+        finally:
+            with self.lock:
+                if viewer in self.viewers:
+                    self.viewers.remove(viewer)
+            connection.close()
+
+    def stream(self, connection, viewer):
+        acknowledged = 0  # Frame the viewer has on screen
+        while self.running:
+            frame = self.store.wait_newer(acknowledged, timeout=1.0)
+            if frame is None:
+                continue
+            viewer.frames_dropped += max(0, frame.frame_id - acknowledged - 1) if acknowledged else 0
+            indices = self.store.changed_tiles(acknowledged, frame)
+            if indices:
+                base = acknowledged if len(indices) < len(frame.tiles) else 0
+                message = bytearray(FRAME_HEADER.pack(frame.frame_id, base, frame.image.width(), frame.image.height(), len(indices)))
+                for index, png in zip(indices, self.store.encode(frame, indices)):
+                    rect = frame.tiles[index]
+                    message += TILE_HEADER.pack(rect.x(), rect.y(), len(png)) + png
+                send_message(connection, OPCODE_BINARY, bytes(message))
+                viewer.frames_sent += 1
+                viewer.bytes_sent += len(message)
+
+                # Wait for this frame to be acknowledged before sending the next one
+                while True:
+                    opcode, payload = receive_message(connection)
+                    if opcode == OPCODE_BINARY and len(payload) == ACK.size and ACK.unpack(payload)[0] == frame.frame_id:
+                        break
+            acknowledged = frame.frame_id
+
+class FrameClient:
+    # Loopback viewer: connects, applies tile deltas to its own copy of the panel and acknowledges each frame
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.sock = socket.create_connection((host, port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall(
+            f"GET / HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        status, headers = read_http_head(self.sock)
+        if " 101 " not in status or headers.get("sec-websocket-accept") != accept_key(key):
+            raise ConnectionError(f"WebSocket handshake failed: {status}")
+        self.image = None
+        self.frame_id = 0
+        self.tiles_received = 0
+        self.bytes_received = 0
+
+    def receive_frame(self):
+        _, payload = receive_message(self.sock)
+        frame_id, base, width, height, count = FRAME_HEADER.unpack_from(payload)
+        if self.image is None or self.image.size() != QtCore.QSize(width, height):
+            self.image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+            self.image.fill(QtCore.Qt.black)
+        offset = FRAME_HEADER.size
+        painter = QtGui.QPainter(self.image)
+        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+        for _ in range(count):
+            x, y, length = TILE_HEADER.unpack_from(payload, offset)
+            offset += TILE_HEADER.size
+            tile = QtGui.QImage.fromData(payload[offset:offset + length], "PNG")
+            painter.drawImage(x, y, tile)
+            offset += length
+        painter.end()
+        self.frame_id = frame_id
+        self.tiles_received += count
+        self.bytes_received += len(payload)
+        send_message(self.sock, OPCODE_BINARY, ACK.pack(frame_id), mask=True)
+        return frame_id, base, count
+
+    def close(self):
+        try:
+            send_message(self.sock, OPCODE_CLOSE, b"", mask=True)
+        except OSError:
+            pass
+        self.sock.close()
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+    parser = argparse.ArgumentParser(description="Loopback viewer for main.py --serve")
+    parser.add_argument("address", nargs="?", default="127.0.0.1:8765", help="HOST:PORT of the frame server")
+    parser.add_argument("--frames", type=int, default=100, help="Frames to receive")
+    parser.add_argument("--output", help="Save the last frame as this image")
+    args = parser.parse_args()
+    host, _, port = args.address.rpartition(":")
+    app = QtGui.QGuiApplication([sys.argv[0]])
+    client = FrameClient(host or "127.0.0.1", int(port))
+    start = time.monotonic()
+    for _ in range(args.frames):
+        frame_id, base, count = client.receive_frame()
+    elapsed = time.monotonic() - start
+    client.close()
+    print(f"{args.frames} frames in {elapsed:.1f} s, last frame {frame_id}, "
+          f"{client.tiles_received / args.frames:.1f} tiles and {client.bytes_received / args.frames / 1024:.1f} KiB per frame")
+    if args.output:
+        client.image.save(args.output)
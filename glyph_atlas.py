@@ -0,0 +1,95 @@
+from PyQt5 import QtGui, QtCore
+import functools
+import math
+from layer_cache import LayerCache
+
+# Digits, signs, units and compass letters used by the numeric readouts
+READOUT_CHARACTERS = "0123456789+-.,° NESWm/sft"
+
+@functools.lru_cache(maxsize=None)
+def cached_atlas(font_key, color_name):
+    font = QtGui.QFont()
+    font.fromString(font_key)
+    return GlyphAtlas(font, color_name)
+
+def glyph_atlas(font, color):
+    # Shared atlas for a font and color, so every instrument using the same readout style reuses one set of glyphs
+    return cached_atlas(font.toString(), QtGui.QColor(color).name(QtGui.QColor.HexArgb))
+
+class GlyphAtlas:
+    PADDING = 2  # Device pixels around each glyph for antialiased edges and overhangs
+
+    def __init__(self, font, color, characters=READOUT_CHARACTERS):
+        self.font = QtGui.QFont(font)
+        self.color = QtGui.QColor(color)
+        self.metrics = QtGui.QFontMetricsF(self.font)
+        self.advances = {}  # Character -> advance in design units
+
+        # Atlas per device scale: (image, character -> (x, width) of its cell in pixels), rasterized on first use
+        self.atlases = LayerCache()
+        self.add_characters(characters)
+
+    def add_characters(self, characters):
+        # Characters outside the atlas are added on first use, which re-rasterizes it once
+        added = [character for character in characters if character not in self.advances]
+        for character in added:
+            self.advances[character] = self.metrics.horizontalAdvance(character)
+        if added:
+            self.atlases.clear()
+
+    def text_rect(self, rect, text, alignment=QtCore.Qt.AlignCenter):
+        # Box the text occupies when drawn into rect with alignment, from ascent to descent
+        self.add_characters(text)
+        width = sum(self.advances[character] for character in text)
+        height = self.metrics.ascent() + self.metrics.descent()
+        if alignment & QtCore.Qt.AlignLeft:
+            x = rect.left()
+        elif alignment & QtCore.Qt.AlignRight:
+            x = rect.right() - width
+        else:
+            x = rect.center().x() - width / 2
+        if alignment & QtCore.Qt.AlignTop:
+            y = rect.top()
+        elif alignment & QtCore.Qt.AlignBottom:
+            y = rect.bottom() - height
+        else:
+            y = rect.center().y() - height / 2
+        return QtCore.QRectF(x, y, width, height)
+
+    def draw_text(self, painter, rect, text, alignment=QtCore.Qt.AlignCenter):
+        # Compose text from cached glyph blits; the painter may be scaled and translated but not rotated
+        box = self.text_rect(QtCore.QRectF(rect), text, alignment)
+        device = painter.deviceTransform()
+        scale = device.m11()
+        image, cells = self.atlases.get(round(scale, 4), lambda: self.render_atlas(scale))
+
+        # Each glyph lands on whole device pixels, so its blit is an unfiltered copy
+        top = (round(box.y() * scale + device.dy()) - self.PADDING - device.dy()) / scale
+        x = box.x()
+        for character in text:
+            cell_x, cell_width = cells[character]
+            left = (round(x * scale + device.dx()) - self.PADDING - device.dx()) / scale
+            painter.drawImage(
+                QtCore.QRectF(left, top, cell_width / scale, image.height() / scale),
+                image, QtCore.QRectF(cell_x, 0, cell_width, image.height()))
+            x += self.advances[character]
+
+    def render_atlas(self, scale):
+        cells = {}
+        width = 0
+        for character, advance in self.advances.items():
+            cells[character] = (width, math.ceil(advance * scale) + 2 * self.PADDING)
+            width += cells[character][1]
+        height = math.ceil((self.metrics.ascent() + self.metrics.descent()) * scale) + 2 * self.PADDING
+
+        image = QtGui.QImage(max(1, width), height, QtGui.QImage.Format_ARGB32_Premultiplied)
+        image.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(image)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setFont(self.font)
+        painter.setPen(self.color)
+        painter.scale(scale, scale)
+        for character, (cell_x, _) in cells.items():
+            painter.drawText(QtCore.QPointF((cell_x + self.PADDING) / scale, self.PADDING / scale + self.metrics.ascent()), character)
+        painter.end()
+        return image, cells
@@ -0,0 +1,139 @@
+import argparse
+import collections
+import json
+import os
+import statistics
+import sys
+import time
+from array import array
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtWidgets, QtGui, QtCore
+from frame_clock import FrameClock, ManualTime
+from instrument_registry import INSTRUMENTS, instrument_class
+from telemetry import TelemetrySample
+
+# Instrument states rendered by the harness, each at a fixed clock time. One tick at that time applies the
+# sample; timers that are due by then (the ALT lamp starts blinking at 15 s) run in that same tick.
+GoldenCase = collections.namedtuple("GoldenCase", "name time sample")
+
+CASES = [
+    GoldenCase("level", 1.0, TelemetrySample(1.0, roll=0, pitch=0, heading=0, altitude=0, vertical_speed=0)),
+    GoldenCase("climbing_turn", 1.0, TelemetrySample(1.0, roll=15, pitch=12.5, heading=47.3, altitude=12345, vertical_speed=3.7)),
+    GoldenCase("descent", 1.0, TelemetrySample(1.0, roll=-18, pitch=-22, heading=300, altitude=87654, vertical_speed=-4.2)),
+    GoldenCase("limits", 1.0, TelemetrySample(1.0, roll=45, pitch=30, heading=359.9, altitude=99999, vertical_speed=10)),
+    GoldenCase("alert", 16.0, TelemetrySample(16.0, roll=5, pitch=2.5, heading=180, altitude=5000, vertical_speed=0.5)),
+]
+
+TIMINGS_FILE = "timings.json"  # Render time of every golden frame in milliseconds, next to the images
+
+class FixedSource:
+    # State source that gives the same sample at any time
+    def __init__(self, sample):
+        self.sample = sample
+
+    def sample_at(self, now):
+        return self.sample
+
+def render_case(name, case, size, repeats):
+    # The instrument gets a clock of its own on manual time, so nothing depends on when the harness runs
+    time_source = ManualTime()
+    clock = FrameClock(time_source=time_source)
+    widget = instrument_class(name)(clock=clock)
+    widget.model.source = FixedSource(case.sample)
+    widget.setAttribute(QtCore.Qt.WA_DontShowOnScreen)
+    widget.resize(size, size)
+    widget.show()  # Hidden widgets are not ticked
+    time_source.now = case.time
+    clock.tick()
+    clock.timer.stop()  # No event loop runs here; the clock only ticks when told to
+
+    # The first render builds the cached layers and is not timed
+    image = QtGui.QImage(size, size, QtGui.QImage.Format_RGB32)
+    times = []
+    for _ in range(repeats + 1):
+        image.fill(QtCore.Qt.black)
+        start = time.perf_counter()
+        widget.render(image)
+        times.append((time.perf_counter() - start) * 1000)
+    widget.hide()
+    widget.deleteLater()
+    return image, statistics.median(times[1:])
+
+def compare_images(image, golden, tolerance):
+    # Number of pixels where any color channel differs by more than tolerance, and the difference image
+    if image.size() != golden.size():
+        return image.width() * image.height(), None
+    difference = golden.convertToFormat(QtGui.QImage.Format_RGB32)
+    painter = QtGui.QPainter(difference)
+    painter.setCompositionMode(QtGui.QPainter.CompositionMode_Difference)
+    painter.drawImage(0, 0, image.convertToFormat(QtGui.QImage.Format_RGB32))
+    painter.end()
+
+    # One byte per channel, 1 where it is over tolerance, then one 32-bit word per pixel
+    data = bytearray(difference.constBits().asstring(difference.sizeInBytes()))
+    data[3::4] = bytes(len(data) // 4)  # Alpha is always opaque
+    over = array("I")
+    over.frombytes(data.translate(bytes(int(value > tolerance) for value in range(256))))
+    return len(over) - over.count(0), difference
+
+def main():
+    parser = argparse.ArgumentParser(description="Render fixed instrument states offscreen and compare them with golden frames")
+    parser.add_argument("--golden", default="golden_frames", help="Directory of golden frames")
+    parser.add_argument("--update", action="store_true", help="Write the rendered frames and timings as the new golden set")
+    parser.add_argument("--instruments", nargs="+", choices=sorted(INSTRUMENTS), default=list(INSTRUMENTS))
+    parser.add_argument("--size", type=int, default=360, help="Widget size in pixels")
+    parser.add_argument("--tolerance", type=int, default=8, help="Largest difference of a color channel (0-255) still counted as equal")
+    parser.add_argument("--max-pixels", type=int, default=0, help="Pixels per frame allowed to differ by more than the tolerance")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed renders per frame; the median is reported")
+    parser.add_argument("--diff", metavar="DIR", help="Save the difference image of every mismatching frame here")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    timings_path = os.path.join(args.golden, TIMINGS_FILE)
+    timings = {}
+    if os.path.exists(timings_path):
+        with open(timings_path) as file:
+            timings = json.load(file)
+    if args.update:
+        os.makedirs(args.golden, exist_ok=True)
+    if args.diff:
+        os.makedirs(args.diff, exist_ok=True)
+
+    failures = []
+    for name in args.instruments:
+        for case in CASES:
+            key = f"{name}-{case.name}"
+            image, render_ms = render_case(name, case, args.size, args.repeats)
+            path = os.path.join(args.golden, f"{key}.png")
+            baseline_ms = timings.get(key)
+            delta = f"{render_ms - baseline_ms:+7.3f} ms ({(render_ms / baseline_ms - 1) * 100:+6.1f}%)" if baseline_ms else ""
+
+            if args.update:
+                image.save(path)
+                timings[key] = render_ms
+                print(f"{key:24} written         render {render_ms:7.3f} ms {delta}")
+                continue
+            if not os.path.exists(path):
+                failures.append(f"{key}: no golden frame, run with --update")
+                print(f"{key:24} MISSING         render {render_ms:7.3f} ms")
+                continue
+
+            differing, difference = compare_images(image, QtGui.QImage(path), args.tolerance)
+            status = "ok" if differing <= args.max_pixels else "MISMATCH"
+            print(f"{key:24} {status:8} {differing:6d} px  render {render_ms:7.3f} ms {delta}")
+            if differing > args.max_pixels:
+                failures.append(f"{key}: {differing} pixels differ by more than {args.tolerance}")
+                if args.diff and difference is not None:
+                    difference.save(os.path.join(args.diff, f"{key}.png"))
+
+    if args.update:
+        with open(timings_path, "w") as file:
+            json.dump(timings, file, indent=2)
+    for failure in failures:
+        print(f"FAILED {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
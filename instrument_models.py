@@ -0,0 +1,130 @@
+class InstrumentModel:
+    MAX_STEP = 1.0  # Longest step in seconds, so a paused instrument resumes instead of jumping
+
+    def __init__(self):
+        self.last_time = None
+        self.source = None  # Telemetry source with sample_at(now); replaces the demo motion when set
+
+    def advance(self, now):
+        # Returns whether the displayed state changed, so idle instruments can let the clock sleep
+        before = self.state()
+        if self.source is not None:
+            # Take the sample the source has for this frame, if it has one yet
+            sample = self.source.sample_at(now)
+            if sample is not None:
+                self.apply(sample)
+        elif self.last_time is not None:
+            # Advance the simulated state by the wall-clock time elapsed since the last call
+            self.step(min(now - self.last_time, self.MAX_STEP))
+        self.last_time = now
+        return self.state() != before
+
+    def state(self):
+        # Values the instrument displays
+        return ()
+
+    def step(self, dt):
+        pass
+
+    def apply(self, sample):
+        pass
+
+class HorizonModel(InstrumentModel):
+    ROLL_RATE = 0.2 / 0.03  # Degrees per second
+    PITCH_RATE = 0.2 / 0.03  # Degrees per second
+
+    def __init__(self):
+        super().__init__()
+        self.roll_angle = 0
+        self.pitch_angle = 0
+        self.pitch_direction = 1  # 1 for nose up, -1 for nose down
+        self.rotation_state = 0  # 0 level, 1 rolling to +20, 2 rolling to -20, 3 returning to level
+
+    def state(self):
+        return (self.roll_angle, self.pitch_angle)
+
+    def apply(self, sample):
+        self.roll_angle = sample.roll
+        self.pitch_angle = sample.pitch
+
+    def start_rotation(self):
+        self.rotation_state = 1
+
+    def step(self, dt):
+        roll_step = self.ROLL_RATE * dt
+        if self.rotation_state == 1:  # Rotate to +20 degrees
+            self.roll_angle = min(self.roll_angle + roll_step, 20)
+            if self.roll_angle >= 20:
+                self.rotation_state = 2
+        elif self.rotation_state == 2:  # Rotate to -20 degrees
+            self.roll_angle = max(self.roll_angle - roll_step, -20)
+            if self.roll_angle <= -20:
+                self.rotation_state = 3
+        elif self.rotation_state == 3:  # Return to initial state
+            self.roll_angle = min(self.roll_angle + roll_step, 0)
+            if self.roll_angle >= 0:
+                self.rotation_state = 0
+
+        self.pitch_angle += self.PITCH_RATE * dt * self.pitch_direction
+        if self.pitch_angle >= 30 or self.pitch_angle <= -30:
+            self.pitch_angle = max(-30, min(30, self.pitch_angle))
+            self.pitch_direction *= -1
+
+class CompassModel(InstrumentModel):
+    TURN_RATE = 0.08 / 0.03  # Degrees per second
+
+    def __init__(self):
+        super().__init__()
+        self.heading_angle = 0
+        self.rotation_direction = 1  # 1 for clockwise, -1 for counterclockwise
+
+    def state(self):
+        return (self.heading_angle,)
+
+    def apply(self, sample):
+        self.heading_angle = sample.heading % 360
+
+    def step(self, dt):
+        self.heading_angle += self.TURN_RATE * dt * self.rotation_direction
+        if self.heading_angle >= 360 or self.heading_angle <= 0:
+            self.heading_angle = max(0, min(360, self.heading_angle))
+            self.rotation_direction *= -1  # Reverse the direction
+
+class AltimeterModel(InstrumentModel):
+    CLIMB_RATE = 2 / 0.03  # Feet per second
+
+    def __init__(self):
+        super().__init__()
+        self.altitude = 0
+
+    def state(self):
+        return (self.altitude,)
+
+    def apply(self, sample):
+        self.altitude = sample.altitude
+
+    def step(self, dt):
+        self.altitude += self.CLIMB_RATE * dt
+        if self.altitude > 100000:
+            self.altitude = 0
+
+class VerticalSpeedModel(InstrumentModel):
+    ACCELERATION = 0.1 / 0.5  # Metres per second, per second
+
+    def __init__(self):
+        super().__init__()
+        self.vertical_speed = 0
+        self.direction = 1  # 1 for increasing, -1 for decreasing
+
+    def state(self):
+        return (self.vertical_speed,)
+
+    def apply(self, sample):
+        self.vertical_speed = sample.vertical_speed
+
+    def step(self, dt):
+        if self.vertical_speed > 5:
+            self.direction = -1
+        elif self.vertical_speed < -5:
+            self.direction = 1
+        self.vertical_speed += self.direction * self.ACCELERATION * dt
@@ -0,0 +1,96 @@
+from PyQt5 import QtWidgets, QtCore
+import collections
+import importlib
+import time
+from instrument_models import HorizonModel, CompassModel, AltimeterModel, VerticalSpeedModel
+from layer_cache import DESIGN_SIZE
+
+# Panel title, where the widget class lives and the model it displays; the module is only imported
+# when an instrument of that kind is first shown
+InstrumentSpec = collections.namedtuple("InstrumentSpec", "title module class_name model_class")
+
+INSTRUMENTS = {
+    "horizon": InstrumentSpec("Artificial Horizon", "artificial_horizon", "ArtificialHorizon", HorizonModel),
+    "compass": InstrumentSpec("Compass", "compass_widget", "CompassWidget", CompassModel),
+    "altimeter": InstrumentSpec("Altimeter", "altimeter_widget", "AltimeterWidget", AltimeterModel),
+    "vsi": InstrumentSpec("Vertical Speed Indicator", "vsi_widget", "VerticalSpeedIndicatorWidget", VerticalSpeedModel),
+}
+
+# Grid cell of one instrument in a panel layout
+Placement = collections.namedtuple("Placement", "name row column row_span column_span alignment", defaults=(1, 1, QtCore.Qt.Alignment()))
+
+def register(name, spec):
+    INSTRUMENTS[name] = spec
+
+def instrument_class(name):
+    spec = INSTRUMENTS[name]
+    return getattr(importlib.import_module(spec.module), spec.class_name)
+
+class LazyInstrument(QtWidgets.QWidget):
+    # Stands in for an instrument until it is first painted, then builds it in place. The model exists
+    # from the start, so sources can be attached before the instrument itself is constructed.
+    created = QtCore.pyqtSignal(QtWidgets.QWidget)
+
+    def __init__(self, name, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.model = INSTRUMENTS[name].model_class()
+        self.widget = None
+        self.pending = False
+        self.setMinimumSize(150, 150)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def sizeHint(self):
+        return QtCore.QSize(DESIGN_SIZE, DESIGN_SIZE)
+
+    def paintEvent(self, event):
+        # The empty cell reaches the screen with the rest of the window; the instrument follows on the next turn
+        if self.widget is None and not self.pending:
+            self.pending = True
+            QtCore.QTimer.singleShot(0, self.materialize)
+
+    def materialize(self):
+        if self.widget is not None:
+            return self.widget
+        self.widget = instrument_class(self.name)(self)
+        self.widget.model = self.model
+        self.layout().addWidget(self.widget)
+        self.created.emit(self.widget)
+        return self.widget
+
+class StartupReport(QtCore.QObject):
+    # Seconds from start until each watched widget first reached the screen
+    completed = QtCore.pyqtSignal()
+
+    def __init__(self, start, parent=None):
+        super().__init__(parent)
+        self.start = start  # time.perf_counter() at process start
+        self.pending = set()  # Names still waiting for their first paint
+        self.watched = {}  # Widget -> name
+        self.first_frames = {}  # Name -> seconds
+
+    def watch(self, widget, name):
+        self.pending.add(name)
+        if isinstance(widget, LazyInstrument) and widget.widget is None:
+            # The placeholder's own paint does not count; wait for the instrument it builds
+            widget.created.connect(lambda instrument: self.watch(instrument, name))
+            return
+        self.watched[widget] = name
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Paint and watched in self.watched:
+            watched.removeEventFilter(self)
+            # Recorded once the paint has finished and been flushed, not when it starts
+            QtCore.QTimer.singleShot(0, lambda name=self.watched.pop(watched): self.record(name))
+        return False
+
+    def record(self, name):
+        self.first_frames[name] = time.perf_counter() - self.start
+        self.pending.discard(name)
+        if not self.pending:
+            self.completed.emit()
+
+    def summary(self):
+        return "First frame: " + ", ".join(f"{name} {seconds:.3f} s" for name, seconds in self.first_frames.items())
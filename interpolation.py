@@ -0,0 +1,78 @@
+import math
+
+class Channel:
+    def __init__(self, circular=False):
+        self.circular = circular  # Degrees that wrap at 360, interpolated the short way round
+        # (t0, v0, t1, v1): the two newest samples, replaced as one tuple so a reader on
+        # another thread never sees half an update
+        self.samples = None
+
+    def push(self, timestamp, value):
+        # Returns whether the value differs from the previous sample
+        if self.circular:
+            value %= 360
+        samples = self.samples
+        if samples is None:
+            self.samples = (timestamp, value, timestamp, value)
+            return True
+        _, _, last_time, last_value = samples
+        if timestamp <= last_time:
+            return False  # Duplicate or reordered packet
+        changed = value != last_value
+        if self.circular:
+            # Keep the pair continuous across 0/360 so the slope is the shortest turn
+            last_value = value - ((value - last_value + 180) % 360 - 180)
+        self.samples = (last_time, last_value, timestamp, value)
+        return changed
+
+    def value_at(self, timestamp, max_extrapolation):
+        t0, v0, t1, v1 = self.samples
+        interval = t1 - t0
+        if interval <= 0:
+            return v1
+        # Linear between the two samples, carried on along the same slope for at most one
+        # sample interval (and max_extrapolation seconds) past the newest, then held
+        position = (timestamp - t0) / interval
+        position = max(0.0, min(position, 1 + min(interval, max_extrapolation) / interval))
+        value = v0 + (v1 - v0) * position
+        return value % 360 if self.circular else value
+
+class SampleInterpolator:
+    MAX_EXTRAPOLATION = 1.0  # Seconds a channel keeps moving past its newest sample
+    RESYNC_THRESHOLD = 2.0  # Seconds of disagreement before the sender clock offset is re-estimated
+
+    def __init__(self, delay=0.0):
+        # Display time lags the feed by delay seconds; with a delay of at least the slowest
+        # channel's interval the instruments only ever interpolate, at the cost of latency
+        self.delay = delay
+        self.channels = {
+            "roll": Channel(),
+            "pitch": Channel(),
+            "heading": Channel(circular=True),
+            "altitude": Channel(),
+            "vertical_speed": Channel(),
+        }
+        self.offset = None  # Local clock minus sender clock, from the quickest packet seen
+
+    def push(self, sample, arrival):
+        # Called from the receiver thread for every packet; channels sent as NaN have no new value.
+        # Returns whether any channel changed, i.e. whether a sleeping display has something new to show.
+        latency = arrival - sample.timestamp
+        if self.offset is None or latency < self.offset or latency - self.offset > self.RESYNC_THRESHOLD:
+            self.offset = latency
+        timestamp = sample.timestamp + self.offset
+        changed = False
+        for name, channel in self.channels.items():
+            value = getattr(sample, name)
+            if not math.isnan(value):
+                changed = channel.push(timestamp, value) or changed
+        return changed
+
+    def values_at(self, now):
+        # Sample fields for the display time now, in constant work however many packets arrived since the last frame
+        if self.offset is None or any(channel.samples is None for channel in self.channels.values()):
+            return None
+        now -= self.delay
+        values = {name: channel.value_at(now, self.MAX_EXTRAPOLATION) for name, channel in self.channels.items()}
+        values["timestamp"] = now - self.offset
+        return values
@@ -0,0 +1,95 @@
+from PyQt5 import QtGui, QtCore
+import collections
+import math
+import threading
+
+# Instruments are drawn in a DESIGN_SIZE x DESIGN_SIZE square of logical units and scaled to fit the widget
+DESIGN_SIZE = 360
+
+def square_transform(width, height):
+    # Maps design units to pixels so DESIGN_SIZE units span the largest centered square of width x height
+    side = min(width, height)
+    return QtGui.QTransform(side / DESIGN_SIZE, 0, 0, side / DESIGN_SIZE, (width - side) / 2, (height - side) / 2)
+
+def instrument_transform(widget):
+    # Maps design units to widget pixels so DESIGN_SIZE units span the instrument square
+    return square_transform(widget.width(), widget.height())
+
+def begin_instrument_painter(widget):
+    # Painter on the widget that takes design units
+    painter = QtGui.QPainter(widget)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setTransform(instrument_transform(widget))
+    return painter
+
+def paint_instrument(widget):
+    # paintEvent of every instrument: blit the frame a render thread finished for it (threaded_render), or paint it now
+    if widget.frame is not None:
+        painter = QtGui.QPainter(widget)
+        painter.drawImage(0, 0, widget.frame)
+        painter.end()
+    else:
+        widget.paint(begin_instrument_painter(widget))
+
+def painter_scale(painter):
+    # Device pixels per design unit for what painter draws, on a widget, a layer or a fleet tile alike.
+    # Taken from the painter rather than a widget, so painting works on any thread; rounded to be a cache key.
+    transform = painter.deviceTransform()
+    return round(math.hypot(transform.m11(), transform.m12()), 4)
+
+class Layer:
+    # Transparent image covering width x height design units at scale device pixels per unit.
+    # The image keeps a device pixel ratio of 1 (Qt ignores ratios below 1), so the scale is applied explicitly.
+    def __init__(self, width, height, scale):
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.image = QtGui.QImage(max(1, round(width * scale)), max(1, round(height * scale)), QtGui.QImage.Format_ARGB32_Premultiplied)
+        self.image.fill(QtCore.Qt.transparent)
+
+    def begin(self):
+        # Painter on the layer that takes design units
+        painter = QtGui.QPainter(self.image)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.scale(self.scale, self.scale)
+        return painter
+
+    def draw(self, painter, x=0, y=0):
+        painter.drawImage(QtCore.QRectF(x, y, self.width, self.height), self.image)
+
+    def source_rect(self, x, y, width, height):
+        # Rectangle in design units converted to the image's pixels
+        return QtCore.QRectF(x * self.scale, y * self.scale, width * self.scale, height * self.scale)
+
+def render_layer(scale, draw, width=DESIGN_SIZE, height=DESIGN_SIZE):
+    layer = Layer(width, height, scale)
+    painter = layer.begin()
+    draw(painter)
+    painter.end()
+    return layer
+
+class LayerCache:
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()  # Caches shared between instruments (glyph atlases) are used from render threads
+
+    def get(self, key, build):
+        # Most recently used entries live at the end; the oldest is evicted once the cache is full
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        # Built outside the lock; if two threads build the same entry, the first one stored wins
+        value = build()
+        with self.lock:
+            value = self.entries.setdefault(key, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -1,65 +1,201 @@
-from PyQt5 import QtWidgets, QtCore, QtGui
-import sys
-from artificial_horizon import ArtificialHorizon
-from compass_widget import CompassWidget
-from altimeter_widget import AltimeterWidget
-from vsi_widget import VerticalSpeedIndicatorWidget  # Import your new widget
-
-def create_labeled_widget(widget, label_text):
-    container = QtWidgets.QWidget()
-    layout = QtWidgets.QVBoxLayout(container)
-    layout.setContentsMargins(0, 0, 0, 0)
-    layout.setSpacing(5)
-
-    label = QtWidgets.QLabel(label_text)
-    label.setStyleSheet("color: #888; font-size: 16px; padding-left: 10px;")  # Add left padding
-    label.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
-    layout.addWidget(label)
-    layout.addWidget(widget)
-
-    return container
-
-def main():
-    app = QtWidgets.QApplication(sys.argv)
-    main_window = QtWidgets.QMainWindow()
-    main_window.setWindowTitle("Flight Instruments")
-    main_window.setGeometry(100, 100, 1000, 800)
-    main_window.setStyleSheet("background-color: black;")
-
-    # Create instance of each widget
-    horizon_widget = ArtificialHorizon()
-    horizon_widget.setStyleSheet("border-radius: 40px; background-color: black;")
-    
-    compass_widget = CompassWidget()
-    compass_widget.setStyleSheet("border-radius: 40px; background-color: black;")
-    
-    altimeter_widget = AltimeterWidget()
-    altimeter_widget.setStyleSheet("border-radius: 40px; background-color: black;")
-    
-    vsi_widget = VerticalSpeedIndicatorWidget()
-    vsi_widget.setStyleSheet("border-radius: 40px; background-color: black;")
-    
-    container = QtWidgets.QWidget()
-    main_layout = QtWidgets.QGridLayout(container)
-    main_layout.setContentsMargins(20, 20, 20, 20)
-    main_layout.setSpacing(10)
-
-    # Add widgets to the grid layout with fixed positions
-    main_layout.addWidget(create_labeled_widget(horizon_widget, "Artificial Horizon"), 0, 0)
-    main_layout.addWidget(create_labeled_widget(compass_widget, "Compass"), 0, 1)
-    main_layout.addWidget(create_labeled_widget(altimeter_widget, "Altimeter"), 0, 2)
-    main_layout.addWidget(create_labeled_widget(vsi_widget, "Vertical Speed Indicator"), 1, 0, 1, 3, alignment=QtCore.Qt.AlignLeft)
-
-    # Add spacers to maintain constant margins
-    main_layout.setRowStretch(0, 1)
-    main_layout.setRowStretch(1, 1)
-    main_layout.setColumnStretch(0, 1)
-    main_layout.setColumnStretch(1, 1)
-    main_layout.setColumnStretch(2, 1)
-
-    main_window.setCentralWidget(container)
-    main_window.show()
-    sys.exit(app.exec_())
-
-if __name__ == "__main__":
-    main()
+import time
+started = time.perf_counter()  # Taken before the Qt imports, so time-to-first-frame includes them
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+import argparse
+import sys
+from telemetry import TelemetryReceiver
+from flight_recorder import FlightRecorder, FlightLog, ReplaySource
+from diagnostics import Diagnostics, DiagnosticsOverlay, MetricsExporter
+from frame_clock import shared_clock
+from instrument_registry import INSTRUMENTS, LazyInstrument, Placement, StartupReport, instrument_class
+
+# Which instrument goes in which cell of the single-aircraft panel
+PANEL_LAYOUT = [
+    Placement("horizon", 0, 0),
+    Placement("compass", 0, 1),
+    Placement("altimeter", 0, 2),
+    Placement("vsi", 1, 0, 1, 3, QtCore.Qt.AlignLeft),
+]
+
+def create_labeled_widget(widget, label_text):
+    container = QtWidgets.QWidget()
+    layout = QtWidgets.QVBoxLayout(container)
+    layout.setContentsMargins(0, 0, 0, 0)
+    layout.setSpacing(5)
+
+    label = QtWidgets.QLabel(label_text)
+    label.setStyleSheet("color: #888; font-size: 16px; padding-left: 10px;")  # Add left padding
+    label.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+    layout.addWidget(label)
+    layout.addWidget(widget)
+
+    return container
+
+def add_replay_shortcuts(window, replay):
+    shortcuts = [
+        (QtCore.Qt.Key_Space, replay.toggle),
+        (QtCore.Qt.Key_Left, lambda: replay.seek(replay.current_time() - 10)),
+        (QtCore.Qt.Key_Right, lambda: replay.seek(replay.current_time() + 10)),
+        (QtCore.Qt.Key_Up, lambda: replay.set_speed(replay.speed * 2)),
+        (QtCore.Qt.Key_Down, lambda: replay.set_speed(replay.speed / 2)),
+    ]
+    for key, action in shortcuts:
+        QtWidgets.QShortcut(QtGui.QKeySequence(key), window, activated=wake_after(action))
+
+def wake_after(action):
+    # A paused or finished replay lets the clock sleep, so every control wakes it
+    def activated():
+        action()
+        shared_clock().wake()
+    return activated
+
+def build_panel(layout=PANEL_LAYOUT, lazy=False):
+    # With lazy, each cell holds a LazyInstrument that imports and builds its instrument when first painted
+    main_window = QtWidgets.QMainWindow()
+    main_window.setWindowTitle("Flight Instruments")
+    main_window.setGeometry(100, 100, 1000, 800)
+    main_window.setStyleSheet("background-color: black;")
+
+    container = QtWidgets.QWidget()
+    main_layout = QtWidgets.QGridLayout(container)
+    main_layout.setContentsMargins(20, 20, 20, 20)
+    main_layout.setSpacing(10)
+
+    # Add widgets to the grid layout with fixed positions
+    instruments = []
+    for placement in layout:
+        widget = LazyInstrument(placement.name) if lazy else instrument_class(placement.name)()
+        widget.setStyleSheet("border-radius: 40px; background-color: black;")
+        main_layout.addWidget(create_labeled_widget(widget, INSTRUMENTS[placement.name].title),
+                              placement.row, placement.column, placement.row_span, placement.column_span,
+                              alignment=placement.alignment)
+        instruments.append(widget)
+
+    # Add spacers to maintain constant margins
+    for row in range(main_layout.rowCount()):
+        main_layout.setRowStretch(row, 1)
+    for column in range(main_layout.columnCount()):
+        main_layout.setColumnStretch(column, 1)
+
+    main_window.setCentralWidget(container)
+    return main_window, instruments
+
+def build_fleet(count):
+    from fleet_view import FleetCanvas, demo_aircraft  # Imports every instrument, so only when the fleet is shown
+    main_window = QtWidgets.QMainWindow()
+    main_window.setWindowTitle("Fleet View")
+    main_window.setGeometry(100, 100, 1500, 900)
+    main_window.setStyleSheet("background-color: black;")
+
+    # A single canvas paints every aircraft instead of four widgets per aircraft
+    fleet_canvas = FleetCanvas(demo_aircraft(count))
+    main_window.setCentralWidget(fleet_canvas)
+    return main_window, [fleet_canvas]
+
+def main():
+    parser = argparse.ArgumentParser(description="Flight instruments demo")
+    parser.add_argument("--telemetry", metavar="ADDRESS", help="Drive the instruments from udp:HOST:PORT or unix:PATH")
+    parser.add_argument("--arinc", metavar="ADDRESS", help="Drive the instruments from ARINC 429 words in datagrams on udp:HOST:PORT or unix:PATH (needs NumPy)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to show the telemetry feed behind, so slow channels interpolate instead of extrapolating")
+    parser.add_argument("--record", metavar="PATH", help="Record the telemetry feed to a flight data file")
+    parser.add_argument("--replay", metavar="PATH", help="Replay a flight data file (space: pause, left/right: seek, up/down: speed)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--diagnostics", action="store_true", help="Show the frame timing overlay at startup (F12 toggles it)")
+    parser.add_argument("--metrics", metavar="PATH", help="Write frame timing metrics in Prometheus text format to PATH")
+    parser.add_argument("--serve", metavar="HOST:PORT", help="Render offscreen and stream the panel to WebSocket viewers instead of showing it")
+    parser.add_argument("--serve-fps", type=float, default=30, help="Frames per second captured for viewers")
+    parser.add_argument("--render-threads", type=int, default=0, metavar="COUNT", help="Render the instruments on COUNT worker threads and only blit the results on the GUI thread")
+    parser.add_argument("--fleet", type=int, metavar="COUNT", help="Show a scrollable grid of COUNT demo aircraft instead of the single panel")
+    args, qt_args = parser.parse_known_args()
+    if sum(map(bool, (args.telemetry, args.arinc, args.replay))) > 1:
+        parser.error("--telemetry, --arinc and --replay are alternative sources")
+    if args.record and not (args.telemetry or args.arinc):
+        parser.error("--record needs --telemetry or --arinc")
+    if args.fleet and (args.telemetry or args.arinc or args.replay):
+        parser.error("--fleet uses demo motion and cannot be combined with --telemetry, --arinc or --replay")
+    if args.fleet and args.render_threads:
+        parser.error("--render-threads renders the single panel; the fleet canvas paints on the GUI thread")
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    if args.fleet:
+        main_window, instruments = build_fleet(args.fleet)
+    else:
+        main_window, instruments = build_panel(lazy=not args.serve)  # Offscreen cells are never painted, so never built
+
+    # Replace the demo motion with live telemetry or a recorded flight
+    source = None
+    if args.telemetry or args.arinc:
+        if args.arinc:
+            from arinc429 import ArincReceiver  # NumPy is only needed for bus captures
+            source = ArincReceiver(args.arinc, delay=args.delay)
+        else:
+            source = TelemetryReceiver(args.telemetry, delay=args.delay)
+        source.clock = shared_clock()  # Parked instruments let the clock sleep until the feed changes
+        if args.record:
+            source.recorder = FlightRecorder(args.record)  # Before start(), so the first packets are recorded too
+        source.start()
+        app.aboutToQuit.connect(source.stop)
+        if args.record:
+            app.aboutToQuit.connect(source.recorder.close)  # After stop(), once the receiver thread is done
+    elif args.replay:
+        source = ReplaySource(FlightLog(args.replay), args.speed)
+        add_replay_shortcuts(main_window, source)
+    if source is not None:
+        for widget in instruments:
+            widget.model.source = source
+
+    # Frame timing overlay and metrics; paint hooks are only installed once either is switched on
+    diagnostics = Diagnostics()
+    instrument_classes = {type(widget) for widget in instruments if not isinstance(widget, LazyInstrument)}
+    overlay = DiagnosticsOverlay(diagnostics, instrument_classes, main_window)
+    QtWidgets.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key_F12), main_window, activated=overlay.toggle)
+    if args.metrics:
+        diagnostics.enable(instrument_classes)
+        exporter = MetricsExporter(diagnostics, args.metrics, parent=main_window)
+
+    # Instrument frames rendered on worker threads, blitted as they finish
+    renderer = None
+    if args.render_threads:
+        from threaded_render import ThreadedRenderer
+        renderer = ThreadedRenderer(main_window, args.render_threads, parent=main_window)
+        app.aboutToQuit.connect(renderer.stop)
+        for widget in instruments:
+            if not isinstance(widget, LazyInstrument):
+                renderer.add(widget)
+
+    # Instruments built after startup join the diagnostics and the render threads as they appear
+    def instrument_created(widget):
+        instrument_classes.add(type(widget))
+        if diagnostics.enabled:
+            diagnostics.install(type(widget))
+        if renderer is not None:
+            renderer.add(widget)
+
+    # Time to first frame of the window and of every instrument, on stderr and in the diagnostics
+    report = StartupReport(started, main_window)
+    report.watch(main_window, "window")
+    for widget in instruments:
+        if isinstance(widget, LazyInstrument):
+            report.watch(widget, widget.name)
+            widget.created.connect(instrument_created)
+        else:
+            report.watch(widget, type(widget).__name__)
+    report.completed.connect(lambda: print(report.summary(), file=sys.stderr))
+    report.completed.connect(lambda: diagnostics.first_frames.update(report.first_frames))
+
+    if args.serve:
+        from frame_server import FrameServer
+        host, _, port = args.serve.rpartition(":")
+        main_window.setAttribute(QtCore.Qt.WA_DontShowOnScreen)
+        server = FrameServer(main_window, host or "127.0.0.1", int(port), args.serve_fps, parent=main_window)
+        app.aboutToQuit.connect(server.stop)
+        print(f"Serving frames on ws://{server.address[0]}:{server.address[1]}/", file=sys.stderr)
+
+    main_window.show()
+    if args.diagnostics:
+        overlay.toggle()
+    sys.exit(app.exec_())
+
+if __name__ == "__main__":
+    main()
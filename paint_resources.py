@@ -0,0 +1,75 @@
+from PyQt5 import QtGui, QtCore
+import collections
+import functools
+
+# Colors, pens, brushes, fonts, gradients and paths shared by every instrument. Each is built the first
+# time it is asked for with a given set of arguments and the same object is returned after that, so
+# callers must not modify it (QPainter copies what it is given). Everything is in design units, so one
+# set serves every size; instruments built with other colors simply get entries of their own.
+
+# Objects built so far per kind of resource. Painting a frame in steady state must not add to it;
+# benchmark.py reports it per frame.
+built = collections.Counter()
+
+def shared(build):
+    @functools.wraps(build)
+    def counted(*args, **kwargs):
+        built[build.__name__] += 1
+        return build(*args, **kwargs)
+    return functools.lru_cache(maxsize=None)(counted)
+
+def built_count():
+    return sum(built.values())
+
+@shared
+def color(name):
+    # Name is anything QColor takes: "#RGB", "#RRGGBB", an SVG color name or a Qt.GlobalColor
+    return QtGui.QColor(name)
+
+@shared
+def pen(color_name, width=1, style=QtCore.Qt.SolidLine, cap=QtCore.Qt.SquareCap):
+    return QtGui.QPen(QtGui.QBrush(color(color_name)), width, style, cap)
+
+@shared
+def brush(color_name):
+    return QtGui.QBrush(color(color_name))
+
+@shared
+def font(family="", point_size=-1, bold=False, pixel_size=-1):
+    # Application default font with the given changes
+    result = QtGui.QFont()
+    if family:
+        result.setFamily(family)
+    if point_size > 0:
+        result.setPointSize(point_size)
+    if pixel_size > 0:
+        result.setPixelSize(pixel_size)
+    result.setBold(bold)
+    return result
+
+@shared
+def linear_gradient(x1, y1, x2, y2, stops):
+    # Stops are (position, color name) pairs; returned as a brush, ready for setBrush and fillRect
+    gradient = QtGui.QLinearGradient(x1, y1, x2, y2)
+    for position, color_name in stops:
+        gradient.setColorAt(position, color(color_name))
+    return QtGui.QBrush(gradient)
+
+@shared
+def radial_gradient(center_x, center_y, radius, stops):
+    gradient = QtGui.QRadialGradient(center_x, center_y, radius)
+    for position, color_name in stops:
+        gradient.setColorAt(position, color(color_name))
+    return QtGui.QBrush(gradient)
+
+@shared
+def rounded_rect_path(x, y, width, height, radius):
+    path = QtGui.QPainterPath()
+    path.addRoundedRect(QtCore.QRectF(x, y, width, height), radius, radius)
+    return path
+
+@shared
+def ellipse_path(x, y, width, height):
+    path = QtGui.QPainterPath()
+    path.addEllipse(QtCore.QRectF(x, y, width, height))
+    return path
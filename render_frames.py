@@ -0,0 +1,104 @@
+import argparse
+import collections
+import multiprocessing
+import os
+import sys
+
+# Filled in by init_worker in every pool process
+worker = {}
+
+def init_worker(log_path, width, height):
+    # Each process needs its own offscreen QApplication and panel
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5 import QtWidgets, QtCore
+    from flight_recorder import FlightLog
+    import main
+
+    app = QtWidgets.QApplication([sys.argv[0]])
+    window, instruments = main.build_panel()
+    window.setAttribute(QtCore.Qt.WA_DontShowOnScreen)
+    window.resize(width, height)
+    window.show()  # Lays out the panel; no event loop runs, so the frame clock never ticks
+    worker.update(app=app, window=window, instruments=instruments, log=FlightLog(log_path), size=(width, height))
+
+def render_frame(timestamp):
+    from PyQt5 import QtGui, QtCore
+    log = worker["log"]
+    window = worker["window"]
+    sample = log.sample(log.find(timestamp))
+    for widget in worker["instruments"]:
+        widget.model.apply(sample)
+
+    # The panel may not shrink to the requested size, so scale it evenly to fit and center it on black
+    width, height = worker["size"]
+    scale = min(width / window.width(), height / window.height())
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_RGBA8888)
+    image.fill(QtCore.Qt.black)
+    painter = QtGui.QPainter(image)
+    painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+    painter.translate((width - window.width() * scale) / 2, (height - window.height() * scale) / 2)
+    painter.scale(scale, scale)
+    window.render(painter)
+    painter.end()
+    return image
+
+def render_chunk(task):
+    # Render one slice of the timeline; PNGs are written here, raw frames go back to the parent
+    first_frame, timestamps, output = task
+    frames = []
+    for offset, timestamp in enumerate(timestamps):
+        image = render_frame(timestamp)
+        if output == "-":
+            frames.append(image.constBits().asstring(image.sizeInBytes()))
+        else:
+            image.save(os.path.join(output, f"frame_{first_frame + offset:06d}.png"))
+    return frames
+
+def write_frames(frames):
+    for frame in frames:
+        sys.stdout.buffer.write(frame)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a recorded flight to video frames without a window")
+    parser.add_argument("recording", help="Flight data file to render")
+    parser.add_argument("-o", "--output", default="-", help="Directory for PNG frames, or - for raw RGBA on stdout")
+    parser.add_argument("--fps", type=float, default=30, help="Frames per second of flight time")
+    parser.add_argument("--start", type=float, default=None, help="Seconds into the flight to start at")
+    parser.add_argument("--end", type=float, default=None, help="Seconds into the flight to stop at")
+    parser.add_argument("--size", default="1000x800", help="Panel size as WIDTHxHEIGHT")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Render processes")
+    parser.add_argument("--chunk", type=int, default=16, help="Frames per task handed to a worker")
+    parser.add_argument("--in-flight", type=int, default=None, help="Chunks queued or finished but not yet written (default: twice the workers)")
+    args = parser.parse_args()
+
+    from flight_recorder import FlightLog
+    log = FlightLog(args.recording)
+    start = log.start_time + (args.start or 0)
+    end = log.end_time if args.end is None else min(log.start_time + args.end, log.end_time)
+    frame_count = max(0, int((end - start) * args.fps) + 1)
+    timestamps = [start + i / args.fps for i in range(frame_count)]
+    log.close()
+
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    if args.output != "-":
+        os.makedirs(args.output, exist_ok=True)
+
+    # Split the timeline into chunks, written back in order for the pipe. Only a bounded window of chunks is
+    # handed out at a time, so a slow reader on stdout holds the workers back instead of finished frames
+    # piling up in memory.
+    tasks = [(i, timestamps[i:i + args.chunk], args.output) for i in range(0, frame_count, args.chunk)]
+    in_flight = max(1, args.in_flight or 2 * args.workers)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.workers, initializer=init_worker, initargs=(args.recording, width, height)) as pool:
+        pending = collections.deque()
+        for task in tasks:
+            if len(pending) == in_flight:
+                write_frames(pending.popleft().get())
+            pending.append(pool.apply_async(render_chunk, (task,)))
+        while pending:
+            write_frames(pending.popleft().get())
+    sys.stdout.buffer.flush()
+    print(f"Rendered {frame_count} frames at {width}x{height}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import collections
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from interpolation import SampleInterpolator
+
+# One telemetry sample: timestamp in seconds, attitude and heading in degrees,
+# altitude in feet and vertical speed in metres per second. A feed whose channels update
+# at different rates sends NaN for the channels that have no new value in a packet.
+TelemetrySample = collections.namedtuple("TelemetrySample", "timestamp roll pitch heading altitude vertical_speed")
+
+# Wire format of a telemetry packet: little-endian double timestamp followed by five floats
+PACKET = struct.Struct("<d5f")
+
+def encode_sample(sample):
+    return PACKET.pack(*sample)
+
+def decode_sample(data):
+    return TelemetrySample(*PACKET.unpack_from(data))
+
+def parse_address(address):
+    # "udp:HOST:PORT" or "unix:PATH"
+    kind, _, rest = address.partition(":")
+    if kind == "udp":
+        host, _, port = rest.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if kind == "unix":
+        return socket.AF_UNIX, rest
+    raise ValueError(f"Unsupported telemetry address: {address}")
+
+class TelemetryReceiver:
+    MAX_DATAGRAM = 65536  # Larger than any packet, so oversized ones are seen whole and dropped
+
+    def __init__(self, address, delay=0.0):
+        self.family, self.address = parse_address(address)
+        self.interpolator = SampleInterpolator(delay)  # Fed per packet here, read per frame by the GUI
+        self.state = [math.nan] * (len(TelemetrySample._fields) - 1)  # Newest value of every channel so far
+        self.dropped = 0  # Packets with the wrong size
+        self.recorder = None  # Optional FlightRecorder, written from the receiver thread
+        self.clock = None  # Optional FrameClock, woken from the receiver thread when the data changes
+        self.running = False
+        self.thread = None
+        self.sock = None
+
+    def start(self):
+        self.sock = socket.socket(self.family, socket.SOCK_DGRAM)
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.sock.bind(self.address)
+        self.sock.settimeout(0.2)  # Wake up regularly to notice stop()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="telemetry-receiver", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if self.family == socket.AF_UNIX and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def run(self):
+        while self.running:
+            try:
+                data = self.sock.recv(self.MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.handle_packet(data, time.monotonic())
+
+    def handle_packet(self, data, arrival):
+        if len(data) != PACKET.size:
+            self.dropped += 1
+            return
+        sample = decode_sample(data)
+
+        # Channels sent as NaN have no new value, so the interpolator only moves the others
+        if self.interpolator.push(sample, arrival) and self.clock is not None:
+            self.clock.wake()
+
+        # The recorder gets complete samples, once every channel has been seen, so a replay never shows NaN
+        self.state = [previous if math.isnan(value) else value for previous, value in zip(self.state, sample[1:])]
+        if self.recorder is not None and not any(map(math.isnan, self.state)):
+            self.recorder.record(TelemetrySample(sample.timestamp, *self.state))
+
+    def sample_at(self, now):
+        # The GUI thread reads the interpolated state for its frame time, never the packets themselves
+        values = self.interpolator.values_at(now)
+        return TelemetrySample(**values) if values is not None else None
+
+# Feet either side of the demo flight's 5000 ft; it climbs and descends at up to 9.1 m/s, inside the VSI's scale
+DEMO_ALTITUDE_SWING = 900
+
+def demo_sample(t, timestamp):
+    # The demo flight t seconds in: a gentle weave, a slow turn and a slow climb and descent
+    return TelemetrySample(
+        timestamp=timestamp,
+        roll=20 * math.sin(t / 4),
+        pitch=10 * math.sin(t / 6),
+        heading=(t * 3) % 360,
+        altitude=5000 + DEMO_ALTITUDE_SWING * math.sin(t / 30),
+        vertical_speed=DEMO_ALTITUDE_SWING / 30 * math.cos(t / 30) * 0.3048,
+    )
+
+def send_demo(address, rate=200, duration=None):
+    # Stand-in for the aircraft: streams a gentle synthetic flight at the given rate
+    family, target = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    start = time.monotonic()
+    interval = 1 / rate
+    next_time = start
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            sample = demo_sample(time.monotonic() - start, time.time())
+            sock.sendto(encode_sample(sample), target)
+            next_time += interval
+            time.sleep(max(0, next_time - time.monotonic()))
+    finally:
+        sock.close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Send demo telemetry to the flight instruments")
+    parser.add_argument("address", help="udp:HOST:PORT or unix:PATH")
+    parser.add_argument("--rate", type=float, default=200, help="Samples per second")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to send for")
+    args = parser.parse_args()
+    send_demo(args.address, args.rate, args.duration)
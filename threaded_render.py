@@ -0,0 +1,113 @@
+from PyQt5 import QtGui, QtCore
+import concurrent.futures
+import copy
+import os
+from frame_clock import FrameClock, ManualTime, shared_clock
+from layer_cache import square_transform
+
+def render_instrument(renderer, width, height, ratio):
+    # Worker thread: the whole instrument into an image for a widget of width x height pixels at ratio device
+    # pixels per pixel, all taken on the GUI thread. Painting only reads the painter and the instrument's own
+    # state, never the renderer's widget geometry.
+    image = QtGui.QImage(max(1, round(width * ratio)), max(1, round(height * ratio)), QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(ratio)
+    image.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(image)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setTransform(square_transform(width, height))
+    renderer.paint(painter)
+    painter.end()
+    return image
+
+class RenderedInstrument:
+    def __init__(self, widget, renderer):
+        self.widget = widget  # Instrument on screen; its paintEvent blits widget.frame once there is one
+        self.renderer = renderer  # Hidden instance of the same class, only ever used by one worker at a time
+        self.future = None  # Frame being rendered
+        self.key = None  # State, lamps and geometry of the frame last submitted
+
+class ThreadedRenderer(QtCore.QObject):
+    # Renders every added instrument into a QImage on a thread pool; the instrument's own paintEvent blits the
+    # finished image on the GUI thread, so diagnostics and the startup report see those paints. Each tick
+    # copies all models at once, so the instruments of a frame show the same moment. An instrument has at most
+    # one frame in flight; if it is not done by the next tick the previous image stays on screen instead of
+    # the GUI thread waiting for it.
+    frame_ready = QtCore.pyqtSignal(object, object)  # RenderedInstrument, Future; queued from the worker
+
+    def __init__(self, window, workers=None, clock=None, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.clock = clock or shared_clock()
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count(), thread_name_prefix="instrument-render")
+        self.instruments = {}  # Widget -> RenderedInstrument
+        self.frames_rendered = 0
+        self.frames_reused = 0  # Ticks on which an instrument changed but its previous frame was still rendering
+        self.frame_ready.connect(self.finish)
+
+        # Renderers are never shown, so they get a clock that never ticks instead of holding the shared one awake
+        self.idle_clock = FrameClock(time_source=ManualTime(), parent=self)
+
+    def add(self, widget):
+        renderer = type(widget)(clock=self.idle_clock)
+        self.idle_clock.timer.stop()
+        self.instruments[widget] = RenderedInstrument(widget, renderer)
+        widget.installEventFilter(self)
+
+        # Ticks run subscriptions in order, so the snapshot is taken after every instrument has advanced
+        self.clock.unsubscribe(self.window, self.tick)
+        self.clock.subscribe(self.window, self.tick)
+
+    def stop(self):
+        self.pool.shutdown(wait=True)
+
+    def frame_key(self, widget):
+        lamps = tuple(lamp.lit for lamp in widget.annunciators.lamps.values()) if hasattr(widget, "annunciators") else ()
+        return widget.model.state(), lamps, self.geometry(widget)
+
+    def geometry(self, widget):
+        return widget.width(), widget.height(), widget.devicePixelRatioF()
+
+    def tick(self, now):
+        for instrument in self.instruments.values():
+            if not self.submit(instrument):
+                self.frames_reused += 1
+        return False  # The instruments themselves keep the clock awake while they move
+
+    def submit(self, instrument):
+        # Starts a frame if the instrument changed since the last one; False if it changed but one is still in flight
+        widget = instrument.widget
+        key = self.frame_key(widget)
+        if key == instrument.key:
+            return True
+        if instrument.future is not None:
+            return False
+
+        # The renderer is idle, so it can be brought up to date here without a lock
+        renderer = instrument.renderer
+        renderer.model = copy.copy(widget.model)
+        if hasattr(widget, "annunciators"):
+            for name, lamp in widget.annunciators.lamps.items():
+                renderer.annunciators.lamps[name].lit = lamp.lit
+
+        instrument.key = key
+        instrument.future = self.pool.submit(render_instrument, renderer, *self.geometry(widget))
+        instrument.future.add_done_callback(lambda future: self.frame_ready.emit(instrument, future))
+        return True
+
+    def finish(self, instrument, future):
+        instrument.future = None
+        image = future.result()
+        self.frames_rendered += 1
+        widget = instrument.widget
+        if instrument.key[2] == self.geometry(widget):  # A frame for an earlier size is dropped
+            widget.frame = image
+            widget.update()
+        self.submit(instrument)  # Catch up with changes made while this frame was rendering
+
+    def eventFilter(self, watched, event):
+        # Until a frame exists for the new size, the instrument paints itself
+        instrument = self.instruments.get(watched)
+        if instrument is not None and event.type() == QtCore.QEvent.Resize:
+            watched.frame = None
+            self.submit(instrument)
+        return False